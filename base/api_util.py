@@ -1,15 +1,15 @@
+import ast
 import json
 import re
 from json.decoder import JSONDecodeError
 
-import allure
-import jsonpath
-
-from common.assertions import Assertions
-from common.debugtalk import DebugTalk
+from common import json_path
+from common.assertions import Assertions, compile_validation
 from common.operator_yaml import OperatorYaml
 from common.record_log import logs
+from common.report_attach import attachments
 from common.send_request import SendRequest
+from common.template_engine import render
 from conf.operator_config import OperatorConfig
 
 
@@ -25,36 +25,7 @@ class RequestBase:
     @staticmethod
     def replace_load(data):
         """Parse and replace dynamic variables in YAML data."""
-        str_data = data
-        if not isinstance(data, str):
-            str_data = json.dumps(data, ensure_ascii=False)
-
-        for i in range(str_data.count('${')):
-            if '${' in str_data and '}' in str_data:
-                start_index = str_data.index('$')
-                end_index = str_data.index('}', start_index)
-                ref_all_params = str_data[start_index:end_index + 1]
-
-                # Extract function name
-                func_name = ref_all_params[2:ref_all_params.index("(")]
-                # Extract parameters inside parentheses
-                func_params = ref_all_params[ref_all_params.index("(") + 1:ref_all_params.index(")")]
-
-                # Call function using getattr
-                extract_data = getattr(DebugTalk(), func_name)(*func_params.split(',') if func_params else "")
-
-                if extract_data and isinstance(extract_data, list):
-                    extract_data = ','.join(e for e in extract_data)
-
-                str_data = str_data.replace(ref_all_params, str(extract_data))
-
-        # Restore to original type
-        if data and isinstance(data, dict):
-            data = json.loads(str_data)
-        else:
-            data = str_data
-
-        return data
+        return render(data)
 
     def specification_yaml(self, base_info, test_case):
         """
@@ -63,82 +34,135 @@ class RequestBase:
         :param test_case: testCase section in YAML
         """
         try:
-            params_type = ['data', 'json', 'params']
-            url_host = self.conf.get_section_for_data('api_envi', 'host')
-
-            api_name = base_info['api_name']
-            allure.attach(api_name, f'API Name: {api_name}', allure.attachment_type.TEXT)
-
-            url = url_host + base_info['url']
-            allure.attach(api_name, f'URL: {url}', allure.attachment_type.TEXT)
-
-            method = base_info['method']
-            allure.attach(api_name, f'Method: {method}', allure.attachment_type.TEXT)
-
-            header = self.replace_load(base_info['header'])
-            allure.attach(api_name, f'Headers: {header}', allure.attachment_type.TEXT)
-
-            # Handle cookies
-            cookie = None
-            if base_info.get('cookies') is not None:
-                cookie = eval(self.replace_load(base_info['cookies']))
-
-            case_name = test_case.pop('case_name')
-            allure.attach(api_name, f'Test Case Name: {case_name}', allure.attachment_type.TEXT)
-
-            # Handle assertions
-            val = self.replace_load(test_case.get('validation'))
-            test_case['validation'] = val
-            validation = eval(test_case.pop('validation'))
-
-            # Handle extraction
-            extract = test_case.pop('extract', None)
-            extract_list = test_case.pop('extract_list', None)
-
-            # Replace parameters
-            for key, value in test_case.items():
-                if key in params_type:
-                    test_case[key] = self.replace_load(value)
-
-            # Handle file upload
-            file, files = test_case.pop('files', None), None
-            if file is not None:
-                for fk, fv in file.items():
-                    allure.attach(json.dumps(file), 'Uploaded File')
-                    files = {fk: open(fv, mode='rb')}
+            case = self.prepare_case(base_info, test_case)
 
             # Send request
             res = self.run.run_main(
-                name=api_name, url=url, case_name=case_name,
-                header=header, method=method, file=files,
-                cookies=cookie, **test_case
+                name=case['api_name'], url=case['url'], case_name=case['case_name'],
+                header=case['header'], method=case['method'], file=case['files'],
+                cookies=case['cookie'], **case['request']
             )
 
-            status_code = res.status_code
-            allure.attach(self.allure_attach_response(res.json()), 'Response Data', allure.attachment_type.TEXT)
+            self.verify_response(case, res)
 
-            try:
-                res_json = json.loads(res.text)
+        except Exception as e:
+            raise e
 
-                # Extraction
-                if extract is not None:
-                    self.extract_data(extract, res.text)
-                if extract_list is not None:
-                    self.extract_data_list(extract_list, res.text)
+    def prepare_case(self, base_info, test_case):
+        """
+        Resolve variables of one case and collect everything needed to send it.
+        :param base_info: baseInfo section in YAML
+        :param test_case: testCase section in YAML (consumed keys are popped)
+        :return: dict with request arguments, validation and extraction rules
+        """
+        params_type = ['data', 'json', 'params']
+        url_host = self.conf.get_section_for_data('api_envi', 'host')
+
+        api_name = base_info['api_name']
+        url = url_host + base_info['url']
+        method = base_info['method']
+
+        header = self.replace_load(base_info['header'])
+        # Header values must be text, templates may render native numbers
+        header = {k: v if v is None or isinstance(v, (str, bytes)) else str(v) for k, v in header.items()}
+
+        # Handle cookies
+        cookie = None
+        if base_info.get('cookies') is not None:
+            cookie = self.replace_load(base_info['cookies'])
+            if isinstance(cookie, str):
+                cookie = ast.literal_eval(cookie)
+
+        case_name = test_case.pop('case_name')
+        # One 'Request Info' attachment per case instead of a file per field
+        attachments.metadata({'API Name': api_name, 'URL': url, 'Method': method,
+                              'Headers': header, 'Test Case Name': case_name})
+
+        # Handle assertions: plans compiled at load time are used as-is,
+        # blocks with placeholders are compiled once rendered
+        validation = compile_validation(self.replace_load(test_case.pop('validation')))
+
+        # Handle extraction
+        extract = test_case.pop('extract', None)
+        extract_list = test_case.pop('extract_list', None)
+
+        # Replace parameters
+        for key, value in test_case.items():
+            if key in params_type:
+                test_case[key] = self.replace_load(value)
+
+        # Handle file upload
+        file, files = test_case.pop('files', None), None
+        if file is not None:
+            for fk, fv in file.items():
+                attachments.attach(json.dumps(file), 'Uploaded File')
+                files = {fk: open(fv, mode='rb')}
+
+        return {
+            'api_name': api_name, 'url': url, 'method': method, 'header': header,
+            'cookie': cookie, 'case_name': case_name, 'validation': validation,
+            'extract': extract, 'extract_list': extract_list, 'files': files,
+            'request': test_case
+        }
+
+    def verify_response(self, case, res):
+        """
+        Run extraction and assertions of a prepared case against its response.
+        :param case: dict returned by prepare_case
+        :param res: response object
+        """
+        status_code = res.status_code
+        res_text = res.text
+
+        try:
+            # Parse the body once; report, extraction and assertions share it
+            res_json = json.loads(res_text)
+        except JSONDecodeError as js:
+            logs.error('Invalid JSON or request failed!')
+            raise js
 
-                # Assertions
-                self.asserts.assert_result(validation, res_json, status_code)
+        # Pretty-printed only if the policy writes the attachment
+        attachments.attach(lambda: self.allure_attach_response(res_json), 'Response Data')
 
-            except JSONDecodeError as js:
-                logs.error('Invalid JSON or request failed!')
-                raise js
-            except Exception as e:
+        try:
+            # Evaluate every JSONPath of the case in one pass over the document
+            try:
+                matches = json_path.compile_paths(self.collect_paths(case)).evaluate(res_json)
+            except json_path.JsonPathError as e:
+                # fall back to per-rule evaluation so the bad rule is reported where it is used
                 logs.error(e)
-                raise e
+                matches = None
+
+            # Extraction
+            if case['extract'] is not None:
+                self.extract_data(case['extract'], res_text, matches)
+            if case['extract_list'] is not None:
+                self.extract_data_list(case['extract_list'], res_text, matches)
+
+            # Assertions
+            self.asserts.assert_result(case['validation'], res_json, status_code, matches)
 
         except Exception as e:
+            logs.error(e)
             raise e
 
+    @staticmethod
+    def collect_paths(case):
+        """All JSONPath expressions used by a case's extract, extract_list and validation."""
+        paths = []
+        for rules in (case['extract'], case['extract_list']):
+            if rules:
+                paths.extend(v for v in rules.values() if isinstance(v, str) and '$' in v)
+        paths.extend(case['validation'].paths())
+        return tuple(paths)
+
+    @staticmethod
+    def find_path(expr, response, matches=None):
+        """JSONPath matches of expr, taken from the single-pass results when available."""
+        if matches is not None and expr in matches:
+            return matches[expr] or False
+        return json_path.jsonpath(json.loads(response), expr)
+
     @classmethod
     def allure_attach_response(cls, response):
         """Format response for Allure attachment."""
@@ -146,11 +170,12 @@ class RequestBase:
             return json.dumps(response, ensure_ascii=False, indent=4)
         return response
 
-    def extract_data(self, testcase_extract, response):
+    def extract_data(self, testcase_extract, response, matches=None):
         """
         Extract values from response using regex or JSONPath.
         :param testcase_extract: extract field in YAML
         :param response: raw response string
+        :param matches: precomputed JSONPath results (expression -> matches)
         """
         try:
             pattern_lst = ['(.*?)', '(.+?)', r'(\d)', r'(\d*)']
@@ -168,22 +193,23 @@ class RequestBase:
 
                 # JSONPath extraction
                 if '$' in value:
-                    ext_json = jsonpath.jsonpath(json.loads(response), value)[0]
+                    ext_json = self.find_path(value, response, matches)[0]
                     if ext_json:
                         extract_data = {key: ext_json}
                     else:
                         extract_data = {key: 'No data extracted!'}
-                    logs.info('Extracted Value:', extract_data)
+                    logs.info('Extracted Value: %s' % extract_data)
                     self.read.write_data(extract_data)
 
         except Exception as e:
             logs.error(e)
 
-    def extract_data_list(self, testcase_extract_list, response):
+    def extract_data_list(self, testcase_extract_list, response, matches=None):
         """
         Extract multiple values (regex or JSONPath). Returns list.
         :param testcase_extract_list: extract_list field in YAML
         :param response: raw response string
+        :param matches: precomputed JSONPath results (expression -> matches)
         """
         try:
             for key, value in testcase_extract_list.items():
@@ -198,7 +224,7 @@ class RequestBase:
 
                 # JSONPath list extraction
                 if "$" in value:
-                    ext_json = jsonpath.jsonpath(json.loads(response), value)
+                    ext_json = self.find_path(value, response, matches)
                     if ext_json:
                         extract_data = {key: ext_json}
                     else:
@@ -1,12 +1,12 @@
 from common.send_request import SendRequest
 from common.operator_yaml import OperatorYaml
 from common.record_log import logs
+from common.report_attach import attachments
 from conf.operator_config import OperatorConfig
-from common.assertions import Assertions
-from common.debugtalk import DebugTalk
-import allure
+from common.assertions import Assertions, compile_validation
+from common.template_engine import render
 import json
-import jsonpath
+from common import json_path
 import re
 import traceback
 from json.decoder import JSONDecodeError
@@ -22,43 +22,19 @@ class RequestBase(object):
 
     @staticmethod
     def handler_yaml_list(data_dict):
-        """Handle list-type parameters in YAML and convert them to a list format"""
-        try:
-            for key, value in data_dict.items():
-                if isinstance(value, list):
-                    value_lst = ','.join(value).split(',')
-                    data_dict[key] = value_lst
-                return data_dict
-        except Exception:
-            logs.error(str(traceback.format_exc()))
+        """Handle list-type parameters in YAML: split comma-joined strings into one list"""
+        for key, value in data_dict.items():
+            # Rendered values keep their native types, only lists of strings are joined
+            if isinstance(value, list) and value and all(isinstance(item, str) for item in value):
+                data_dict[key] = ','.join(value).split(',')
+        return data_dict
 
     def replace_load(self, data):
         """Replace dynamic expressions in YAML using DebugTalk functions"""
-        str_data = data
-        if not isinstance(data, str):
-            str_data = json.dumps(data, ensure_ascii=False)
-        for i in range(str_data.count('${')):
-            if '${' in str_data and '}' in str_data:
-                start_index = str_data.index('$')
-                end_index = str_data.index('}', start_index)
-                ref_all_params = str_data[start_index:end_index + 1]
-
-                # extract function name
-                func_name = ref_all_params[2:ref_all_params.index("(")]
-                # extract parameters
-                func_params = ref_all_params[ref_all_params.index("(") + 1:ref_all_params.index(")")]
-
-                extract_data = getattr(DebugTalk(), func_name)(*func_params.split(',') if func_params else "")
-                if extract_data and isinstance(extract_data, list):
-                    extract_data = ','.join(e for e in extract_data)
-                str_data = str_data.replace(ref_all_params, str(extract_data))
-
-        # restore original type
+        data = render(data)
         if data and isinstance(data, dict):
-            data = json.loads(str_data)
-            self.handler_yaml_list(data)
-        else:
-            data = str_data
+            # rendered blocks may share static values with the YAML source, work on a copy
+            data = self.handler_yaml_list(dict(data))
         return data
 
     def specification_yaml(self, case_info):
@@ -71,34 +47,29 @@ class RequestBase(object):
         try:
             base_url = self.conf.get_section_for_data('api_envi', 'host')
             url = base_url + case_info["baseInfo"]["url"]
-            allure.attach(url, f'API URL：{url}')
-
             api_name = case_info["baseInfo"]["api_name"]
-            allure.attach(api_name, f'API Name：{api_name}')
-
             method = case_info["baseInfo"]["method"]
-            allure.attach(method, f'Request Method：{method}')
 
             header = self.replace_load(case_info["baseInfo"]["header"])
-            allure.attach(str(header), 'Request Headers', allure.attachment_type.TEXT)
+            # header values must be text, templates may render native numbers
+            header = {k: v if v is None or isinstance(v, (str, bytes)) else str(v) for k, v in header.items()}
 
             try:
                 cookie = self.replace_load(case_info["baseInfo"]["cookies"])
-                allure.attach(str(cookie), 'Cookie', allure.attachment_type.TEXT)
             except:
                 pass
 
             for tc in case_info["testCase"]:
                 case_name = tc.pop("case_name")
-                allure.attach(case_name, f'Test Case Name：{case_name}', allure.attachment_type.TEXT)
 
                 # parse validation field
-                val = self.replace_load(tc.get('validation'))
-                tc['validation'] = val
+                validation = compile_validation(self.replace_load(tc.pop('validation')))
+                allure_validation = str([str(list(i.values())) for i in validation.raw])
 
-                validation = eval(tc.pop('validation'))
-                allure_validation = str([str(list(i.values())) for i in validation])
-                allure.attach(allure_validation, "Expected Result", allure.attachment_type.TEXT)
+                # one 'Request Info' attachment per case instead of a file per field
+                attachments.metadata({'API URL': url, 'API Name': api_name, 'Request Method': method,
+                                      'Request Headers': header, 'Cookie': cookie, 'Test Case Name': case_name,
+                                      'Expected Result': allure_validation})
 
                 extract = tc.pop('extract', None)
                 extract_lst = tc.pop('extract_list', None)
@@ -111,7 +82,7 @@ class RequestBase(object):
                 file, files = tc.pop("files", None), None
                 if file is not None:
                     for fk, fv in file.items():
-                        allure.attach(json.dumps(file), 'Uploaded File')
+                        attachments.attach(json.dumps(file), 'Uploaded File')
                         files = {fk: open(fv, 'rb')}
 
                 res = self.run.run_main(
@@ -125,23 +96,36 @@ class RequestBase(object):
                 )
 
                 res_text = res.text
-                allure.attach(res_text, 'Response Text', allure.attachment_type.TEXT)
                 status_code = res.status_code
-                allure.attach(self.allure_attach_response(res.json()), 'Formatted Response', allure.attachment_type.TEXT)
 
                 try:
+                    # parse the body once, report/extraction/assertions share it
                     res_json = json.loads(res_text)
+                    # the formatted copy replaces the raw text, pretty-printed only if it is written
+                    attachments.attach(lambda: self.allure_attach_response(res_json), 'Formatted Response')
+
+                    # evaluate every JSONPath of the case in one pass over the document
+                    paths = [v for rules in (extract, extract_lst) if rules
+                             for v in rules.values() if isinstance(v, str) and '$' in v]
+                    paths.extend(validation.paths())
+                    try:
+                        matches = json_path.compile_paths(tuple(paths)).evaluate(res_json)
+                    except json_path.JsonPathError as e:
+                        # fall back to per-rule evaluation so the bad rule is reported where it is used
+                        logs.error(e)
+                        matches = None
 
                     # parameter extraction
                     if extract is not None:
-                        self.extract_data(extract, res_text)
+                        self.extract_data(extract, res_text, matches)
                     if extract_lst is not None:
-                        self.extract_data_list(extract_lst, res_text)
+                        self.extract_data_list(extract_lst, res_text, matches)
 
                     # perform assertions
-                    assert_res.assert_result(validation, res_json, status_code)
+                    assert_res.assert_result(validation, res_json, status_code, matches)
 
                 except JSONDecodeError as js:
+                    attachments.attach(res_text, 'Response Text')
                     logs.error("System error or invalid API response!")
                     raise js
                 except Exception as e:
@@ -161,11 +145,19 @@ class RequestBase(object):
             allure_response = response
         return allure_response
 
-    def extract_data(self, testcase_extract, response):
+    @staticmethod
+    def find_path(expr, response, matches=None):
+        """JSONPath matches of expr, taken from the single-pass results when available"""
+        if matches is not None and expr in matches:
+            return matches[expr] or False
+        return json_path.jsonpath(json.loads(response), expr)
+
+    def extract_data(self, testcase_extract, response, matches=None):
         """
         Extract a single parameter using regex or JSONPath
         :param testcase_extract: extract field in YAML
         :param response: API response string
+        :param matches: precomputed JSONPath results (expression -> matches)
         """
         pattern_lst = ['(.+?)', '(.*?)', r'(\d+)', r'(\d*)']
         try:
@@ -183,7 +175,7 @@ class RequestBase(object):
 
                 # jsonpath extraction
                 if "$" in value:
-                    ext_json = jsonpath.jsonpath(json.loads(response), value)[0]
+                    ext_json = self.find_path(value, response, matches)[0]
                     if ext_json:
                         extract_date = {key: ext_json}
                     else:
@@ -193,11 +185,12 @@ class RequestBase(object):
         except:
             logs.error('Extraction failed, please check extract expression in YAML!')
 
-    def extract_data_list(self, testcase_extract_list, response):
+    def extract_data_list(self, testcase_extract_list, response, matches=None):
         """
         Extract multiple parameters using regex or JSONPath
         :param testcase_extract_list: extract_list in YAML
         :param response: API response string
+        :param matches: precomputed JSONPath results (expression -> matches)
         """
         try:
             for key, value in testcase_extract_list.items():
@@ -211,7 +204,7 @@ class RequestBase(object):
 
                 # JSONPath list extraction
                 if "$" in value:
-                    ext_json = jsonpath.jsonpath(json.loads(response), value)
+                    ext_json = self.find_path(value, response, matches)
                     if ext_json:
                         extract_date = {key: ext_json}
                     else:
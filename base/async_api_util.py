@@ -0,0 +1,91 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from base.api_util import RequestBase
+from common.record_log import logs
+from conf import setting
+
+
+class AsyncRequestBase(RequestBase):
+    """
+    Asyncio execution engine for YAML cases.
+    Independent cases share one event loop; variable replacement, extraction,
+    assertions and report attachments run on the loop thread exactly as in
+    RequestBase, while the blocking HTTP send runs in a bounded thread pool
+    on the shared pooled transport.
+    """
+
+    def __init__(self, concurrency=None):
+        super().__init__()
+        self.concurrency = concurrency or setting.ASYNC_CONCURRENCY
+
+    async def specification_yaml_async(self, base_info, test_case, executor=None):
+        """
+        Async counterpart of specification_yaml.
+        :param base_info: baseInfo section in YAML
+        :param test_case: testCase section in YAML
+        :param executor: executor used for the blocking send
+        """
+        case = self.prepare_case(base_info, test_case)
+
+        res = await self.run.run_main_async(
+            name=case['api_name'], url=case['url'], case_name=case['case_name'],
+            header=case['header'], method=case['method'], file=case['files'],
+            cookies=case['cookie'], executor=executor, **case['request']
+        )
+
+        self.verify_response(case, res)
+
+    async def run_case(self, base_info, test_case, semaphore, executor):
+        """
+        Run one case under the concurrency limit and capture its outcome.
+        :return: result dict with case_name, status (passed/failed), error and elapsed
+        """
+        # Cases are consumed by prepare_case, keep the caller's data intact
+        test_case = dict(test_case)
+        result = {'case_name': test_case.get('case_name'), 'status': 'failed', 'error': None}
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await self.specification_yaml_async(base_info, test_case, executor=executor)
+                result['status'] = 'passed'
+            except (KeyboardInterrupt, SystemExit, asyncio.CancelledError):
+                raise
+            except BaseException as e:
+                result['error'] = e
+            result['elapsed'] = time.perf_counter() - start
+        return result
+
+    async def run_cases(self, cases):
+        """
+        Run [base_info, test_case] pairs concurrently.
+        :param cases: list as returned by get_testcase_yaml
+        :return: list of result dicts in input order
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='async-case') as executor:
+            return await asyncio.gather(
+                *(self.run_case(base_info, test_case, semaphore, executor) for base_info, test_case in cases))
+
+    def run_all(self, cases):
+        """
+        Blocking entry point for pytest tests: run cases on a fresh event loop
+        and fail with a summary when any case failed.
+        (Not `run`: RequestBase keeps its SendRequest in self.run.)
+        :param cases: list as returned by get_testcase_yaml
+        :return: list of result dicts
+        """
+        results = asyncio.run(self.run_cases(cases))
+        self.raise_for_results(results)
+        return results
+
+    @staticmethod
+    def raise_for_results(results):
+        """Log a run summary and raise AssertionError listing every case that did not pass."""
+        failed = [r for r in results if r['status'] != 'passed']
+        logs.info('Async run finished: %s cases, %s not passed' % (len(results), len(failed)))
+        if failed:
+            details = '\n'.join(f"[{r['status']}] {r['case_name']}: {r['error']!r}" for r in failed)
+            raise AssertionError(f'{len(failed)} of {len(results)} cases did not pass:\n{details}')
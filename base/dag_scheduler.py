@@ -0,0 +1,343 @@
+import asyncio
+import heapq
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from base.async_api_util import AsyncRequestBase
+from common.operator_yaml import get_testcase_yaml
+from common.record_log import logs
+
+# Keys read from extract.yaml by a case, e.g. ${get_extract_data(goodsId,0)}
+EXTRACT_REF_PATTERN = re.compile(r'\$\{get_extract_data\(\s*([^,)\s]+)')
+
+# YAML files that hold extracted data rather than test cases
+NON_CASE_FILES = {'extract.yaml'}
+
+
+def case_key(base_info, test_case):
+    """Identity of a case across the graph and the collected pytest items."""
+    return base_info.get('api_name'), base_info.get('url'), test_case.get('case_name')
+
+
+def item_case_keys(item):
+    """
+    Case keys of a collected pytest item, taken from its parametrized YAML:
+    a (base_info, testcase) pair or a business-scenario block with baseInfo/testCase.
+    """
+    params = getattr(getattr(item, 'callspec', None), 'params', {})
+    base_info = test_case = None
+    keys = []
+    for value in params.values():
+        if not isinstance(value, dict):
+            continue
+        if 'baseInfo' in value:
+            keys.extend(case_key(value['baseInfo'], tc) for tc in value.get('testCase') or [])
+        elif 'api_name' in value:
+            base_info = value
+        elif 'case_name' in value:
+            test_case = value
+    if base_info is not None and test_case is not None:
+        keys.append(case_key(base_info, test_case))
+    return keys
+
+
+def _same_directory(node, item):
+    """Test modules read the YAML files next to them, e.g. ProductManager/test_productList.py."""
+    path = getattr(item, 'path', None)
+    return path is not None and os.path.dirname(os.path.abspath(node.file)) == os.path.dirname(str(path))
+
+
+class CaseNode:
+    """One YAML test case plus the extract keys it writes and reads."""
+
+    def __init__(self, index, file, base_info, test_case):
+        self.index = index
+        self.file = file
+        self.base_info = base_info
+        self.test_case = test_case
+        self.name = f"{os.path.basename(file)}::{test_case.get('case_name')}"
+        self.produces = set(test_case.get('extract') or {}) | set(test_case.get('extract_list') or {})
+        self.consumes = self.find_references(base_info, test_case) - self.produces
+        # Data edges: a failed producer skips its dependents
+        self.depends_on = set()
+        self.dependents = set()
+        # Ordering-only edges: the node waits for them but still runs if they fail
+        self.after = set()
+        self.followers = set()
+
+    @property
+    def predecessors(self):
+        return self.depends_on | self.after
+
+    @staticmethod
+    def find_references(base_info, test_case):
+        """Collect every extract key referenced through get_extract_data."""
+        blocks = [base_info] + [v for k, v in test_case.items() if k not in ('extract', 'extract_list')]
+        text = json.dumps(blocks, ensure_ascii=False, default=str)
+        return set(EXTRACT_REF_PATTERN.findall(text))
+
+    def __repr__(self):
+        return f'CaseNode({self.name})'
+
+
+class CaseGraph:
+    """
+    Producer/consumer DAG of YAML cases built from extract/extract_list
+    writes and ${get_extract_data(name)} reads.
+    The extract store is last-writer-wins, so every key has a single,
+    deterministic value for each reader:
+    - writers of the same key run one after another in declaration order;
+    - a consumer reads the last writer declared before it (the last writer
+      overall when the key is only produced later), and the next writer of
+      the key waits until the consumer has run.
+    Only the producer -> consumer edges carry data; the others just order
+    cases and do not skip anything when a case fails. Keys nobody produces
+    (e.g. the login token) add no edge.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        producers = {}
+        for node in nodes:
+            for key in node.produces:
+                producers.setdefault(key, []).append(node)
+
+        for writers in producers.values():
+            for earlier, later in zip(writers, writers[1:]):
+                self.add_order(earlier, later)
+
+        for node in nodes:
+            for key in node.consumes:
+                writers = producers.get(key)
+                if not writers:
+                    continue
+                earlier = [w for w in writers if w.index < node.index]
+                later = [w for w in writers if w.index > node.index]
+                source = earlier[-1] if earlier else writers[-1]
+                node.depends_on.add(source)
+                source.dependents.add(node)
+                node.after.discard(source)
+                source.followers.discard(node)
+                if earlier and later:
+                    self.add_order(node, later[0])
+
+        self.check_acyclic()
+        logs.info('Case graph built: %s cases, %s dependencies'
+                  % (len(nodes), sum(len(n.predecessors) for n in nodes)))
+
+    @staticmethod
+    def add_order(first, then):
+        """Ordering-only edge: `then` starts after `first` has finished."""
+        if first not in then.depends_on:
+            then.after.add(first)
+            first.followers.add(then)
+
+    @classmethod
+    def from_paths(cls, *paths):
+        """
+        Scan YAML files (or directories of them) at collection time.
+        Both the single-interface format (one baseInfo, many testCase) and the
+        business-scenario format (a list of baseInfo/testCase blocks) are read.
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, dirs, names in os.walk(path):
+                    dirs.sort()
+                    files.extend(os.path.join(root, n) for n in sorted(names)
+                                 if n.endswith(('.yaml', '.yml')) and n not in NON_CASE_FILES)
+            else:
+                files.append(path)
+
+        nodes = []
+        for file in files:
+            for base_info, test_case in cls.read_cases(file):
+                nodes.append(CaseNode(len(nodes), file, base_info, test_case))
+        return cls(nodes)
+
+    @staticmethod
+    def read_cases(file):
+        """Normalize a YAML test file into [base_info, test_case] pairs."""
+        pairs = []
+        for item in get_testcase_yaml(file) or []:
+            if isinstance(item, dict) and 'baseInfo' in item:
+                pairs.extend([item['baseInfo'], tc] for tc in item.get('testCase') or [])
+            elif isinstance(item, (list, tuple)) and len(item) == 2:
+                pairs.append(list(item))
+            else:
+                logs.error(f'Case graph: unsupported case format in {file}, skipped')
+                break
+        return pairs
+
+    def match_items(self, items):
+        """
+        Node -> pytest item running it. Items are matched through their
+        parametrized YAML data, one node per case: when several files hold a
+        case with the same key (a business scenario repeating single-interface
+        cases), the item takes the node from the YAML next to its test module,
+        otherwise the first node not taken yet.
+        """
+        nodes_by_key = {}
+        for node in self.nodes:
+            nodes_by_key.setdefault(case_key(node.base_info, node.test_case), []).append(node)
+        owner = {}
+        for item in items:
+            for key in item_case_keys(item):
+                free = [node for node in nodes_by_key.get(key, ()) if node not in owner]
+                if free:
+                    local = [node for node in free if _same_directory(node, item)]
+                    owner[(local or free)[0]] = item
+        return owner
+
+    def _item_edges(self, owner, edges):
+        """item -> items it waits for along the given node edges (e.g. predecessors)."""
+        waits = {}
+        for node, item in owner.items():
+            for dep in edges(node):
+                dep_item = owner.get(dep)
+                if dep_item is not None and dep_item is not item:
+                    waits.setdefault(item, set()).add(dep_item)
+        return waits
+
+    def upstream_items(self, items):
+        """item -> items whose extracted data it reads; when one of them fails the item is skipped."""
+        return self._item_edges(self.match_items(items), lambda node: node.depends_on)
+
+    def order_items(self, items):
+        """
+        Reorder collected pytest items so every case runs after the cases it
+        depends on; otherwise the collection order is kept.
+        """
+        waits = self._item_edges(self.match_items(items), lambda node: node.predecessors)
+        predecessors = {item: waits.get(item, set()) for item in items}
+
+        # Kahn's algorithm, always taking the earliest collected item that is ready
+        position = {item: i for i, item in enumerate(items)}
+        successors = {item: [] for item in items}
+        for item, deps in predecessors.items():
+            for dep in deps:
+                successors[dep].append(item)
+        waiting = {item: len(deps) for item, deps in predecessors.items()}
+        ready = [position[item] for item in items if not waiting[item]]
+        heapq.heapify(ready)
+        ordered = []
+        while ready:
+            item = items[heapq.heappop(ready)]
+            ordered.append(item)
+            for successor in successors[item]:
+                waiting[successor] -= 1
+                if not waiting[successor]:
+                    heapq.heappush(ready, position[successor])
+        if len(ordered) < len(items):
+            # Items bundling several cases (business scenarios) can depend on each other both ways
+            placed = set(ordered)
+            ordered.extend(item for item in items if item not in placed)
+        return ordered
+
+    def check_acyclic(self):
+        """Raise ValueError naming a dependency cycle if there is one."""
+        state = {}
+
+        for start in self.nodes:
+            if start in state:
+                continue
+            stack = [(start, iter(start.predecessors))]
+            path = [start]
+            state[start] = 'visiting'
+            while stack:
+                node, deps = stack[-1]
+                for dep in deps:
+                    if state.get(dep) == 'visiting':
+                        cycle = path[path.index(dep):] + [dep]
+                        raise ValueError('Extract dependency cycle: ' + ' -> '.join(n.name for n in cycle))
+                    if dep not in state:
+                        state[dep] = 'visiting'
+                        stack.append((dep, iter(dep.predecessors)))
+                        path.append(dep)
+                        break
+                else:
+                    state[node] = 'done'
+                    stack.pop()
+                    path.pop()
+
+
+class DagScheduler:
+    """
+    Run a CaseGraph on the asyncio engine: every case whose producers have
+    passed is started at once, and when a producer fails all of its
+    downstream cases are skipped immediately.
+
+    Usage in a test module:
+        graph = CaseGraph.from_paths('./testcase/ProductManager')
+
+        def test_product_manager_graph():
+            DagScheduler(graph).run()
+
+    Under plain pytest the root conftest uses the same graph to order the
+    collected cases (CaseGraph.order_items) and skips a case whose upstream
+    case failed (CaseGraph.upstream_items).
+    """
+
+    def __init__(self, graph, concurrency=None):
+        self.graph = graph
+        self.engine = AsyncRequestBase(concurrency)
+
+    async def run_graph(self):
+        """
+        :return: list of result dicts (status passed/failed/skipped) in graph order
+        """
+        results = {}
+        waiting = {node: len(node.predecessors) for node in self.graph.nodes}
+        semaphore = asyncio.Semaphore(self.engine.concurrency)
+
+        def finish(node, passed):
+            """Release the successors of a finished node; a failure skips its data dependents."""
+            stack = [(node, passed)]
+            while stack:
+                node, passed = stack.pop()
+                for successor in node.dependents | node.followers:
+                    if successor in results:
+                        continue
+                    if not passed and successor in node.dependents:
+                        results[successor] = {
+                            'case_name': successor.name, 'status': 'skipped', 'elapsed': 0,
+                            'error': f'upstream case {node.name} did not pass'
+                        }
+                        logs.warning(f'Case skipped, upstream case {node.name} did not pass: {successor.name}')
+                        # Skipped cases still release the cases merely ordered after them
+                        stack.append((successor, False))
+                        continue
+                    waiting[successor] -= 1
+                    if not waiting[successor]:
+                        start(successor)
+
+        with ThreadPoolExecutor(max_workers=self.engine.concurrency, thread_name_prefix='dag-case') as executor:
+
+            def start(node):
+                task = asyncio.ensure_future(
+                    self.engine.run_case(node.base_info, node.test_case, semaphore, executor))
+                running[task] = node
+
+            running = {}
+            for node in self.graph.nodes:
+                if not waiting[node]:
+                    start(node)
+
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node = running.pop(task)
+                    result = task.result()
+                    result['case_name'] = node.name
+                    results[node] = result
+                    finish(node, result['status'] == 'passed')
+
+        return [results[node] for node in self.graph.nodes]
+
+    def run(self):
+        """Blocking entry point for pytest tests; fails listing cases that did not pass."""
+        results = asyncio.run(self.run_graph())
+        self.engine.raise_for_results(results)
+        return results
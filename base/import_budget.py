@@ -0,0 +1,79 @@
+"""
+Import-time budget check for a pure-HTTP run.
+
+Imports the modules an HTTP-only suite loads in a fresh interpreter with
+`python -X importtime`. The check fails when their cumulative import time
+exceeds setting.IMPORT_TIME_BUDGET, or when any database/SSH driver got
+imported along the way. Run it from the project root, e.g. in CI:
+
+    python -m base.import_budget
+"""
+import re
+import subprocess
+import sys
+
+from conf import setting
+
+# Entry points of an HTTP-only run (root conftest, case loading, request pipeline)
+HTTP_MODULES = [
+    'conftest',
+    'base.api_util',
+    'base.apiutil_business',
+    'common.operator_yaml',
+    'common.assertions',
+]
+
+# Drivers that must only be imported by suites that use them
+LAZY_DRIVERS = ['pandas', 'numpy', 'pymysql', 'pymongo', 'redis', 'paramiko', 'sqlalchemy',
+                'clickhouse_sqlalchemy', 'openpyxl']
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def measure(modules=None):
+    """
+    Import modules in a new interpreter.
+    :return: (seconds, drivers imported, [(cumulative_us, module), ...] slowest first)
+    """
+    modules = modules or HTTP_MODULES
+    code = (f'import sys\nimport {", ".join(modules)}\n'
+            f'print(",".join(m for m in {LAZY_DRIVERS!r} if m in sys.modules))')
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=setting.ROOT_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f'Importing {modules} failed:\n{proc.stderr}')
+
+    total_us, entries = 0, []
+    for line in proc.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            cumulative, depth, name = int(match.group(2)), len(match.group(3)), match.group(4)
+            entries.append((cumulative, name))
+            if depth == 1:
+                # top-level imports; nested ones are already in their parent's total
+                total_us += cumulative
+    drivers = [name for name in proc.stdout.strip().split(',') if name]
+    return total_us / 1e6, drivers, sorted(entries, reverse=True)
+
+
+def main(budget=None, top=10):
+    budget = setting.IMPORT_TIME_BUDGET if budget is None else budget
+    seconds, drivers, entries = measure()
+    print(f'Import time of {len(HTTP_MODULES)} HTTP entry modules: {seconds:.3f}s (budget {budget:.3f}s)')
+    for cumulative, name in entries[:top]:
+        print(f'  {cumulative / 1000:8.1f} ms  {name}')
+
+    failed = False
+    if seconds > budget:
+        print(f'FAIL: import time exceeds the budget by {seconds - budget:.3f}s')
+        failed = True
+    if drivers:
+        print(f'FAIL: drivers imported eagerly: {", ".join(drivers)}')
+        failed = True
+    if not failed:
+        print('OK')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,207 @@
+import ast
 import allure
-import jsonpath
 import operator
 
+from common import json_path
 from common.record_log import logs
-from common.connection import MysqlConnection
+from common.report_attach import attachments
+from common.template_engine import compile_template
+
+# Assertion type name used in YAML (`- contains: {...}`) -> Assertion subclass
+ASSERTION_TYPES = {}
+
+
+def register_assertion(name):
+    """Class decorator that makes an Assertion subclass usable as `- name: ...` in validation."""
+
+    def decorator(cls):
+        cls.name = name
+        ASSERTION_TYPES[name] = cls
+        return cls
+
+    return decorator
+
+
+class Assertion:
+    """
+    One compiled validation rule. Subclasses check the expected value once in
+    validate() (raise ValueError when it is malformed) and compare it with a
+    response in check(), returning 0 on success and >0 on failure.
+    """
+    name = None
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.validate()
+
+    def validate(self):
+        pass
+
+    def paths(self):
+        """JSONPath expressions check() will look up in the precomputed matches."""
+        return ()
+
+    def check(self, response, status_code, matches=None):
+        raise NotImplementedError
+
+    def _require_mapping(self):
+        if not isinstance(self.expected, dict) or not self.expected:
+            raise ValueError(f'"{self.name}" assertion expects a non-empty mapping, got {self.expected!r}')
+
+    def __repr__(self):
+        return f'{self.name}: {self.expected!r}'
+
+
+@register_assertion('contains')
+class ContainsAssertion(Assertion):
+    def validate(self):
+        self._require_mapping()
+        self._paths = tuple("$..%s" % key for key in self.expected if key != "status_code")
+
+    def paths(self):
+        return self._paths
+
+    def check(self, response, status_code, matches=None):
+        return Assertions.contains_assert(self.expected, response, status_code, matches)
+
+
+@register_assertion('inc')
+class IncludeAssertion(Assertion):
+    """Key presence: `- inc: status` (or a list of keys) passes when the response has the key anywhere."""
+
+    def validate(self):
+        keys = [self.expected] if isinstance(self.expected, str) else self.expected
+        if not isinstance(keys, list) or not keys or not all(isinstance(key, str) and key for key in keys):
+            raise ValueError(f'"inc" assertion expects a key name or a list of them, got {self.expected!r}')
+        self._paths = tuple("$..%s" % key for key in keys)
+
+    def paths(self):
+        return self._paths
+
+    def check(self, response, status_code, matches=None):
+        return Assertions.include_assert(self._paths, response, matches)
+
+
+@register_assertion('eq')
+class EqualAssertion(Assertion):
+    validate = Assertion._require_mapping
+
+    def check(self, response, status_code, matches=None):
+        return Assertions.equal_assert(self.expected, response)
+
+
+@register_assertion('ne')
+class NotEqualAssertion(Assertion):
+    validate = Assertion._require_mapping
+
+    def check(self, response, status_code, matches=None):
+        return Assertions.not_equal_assert(self.expected, response)
+
+
+@register_assertion('rv')
+class AnyValueAssertion(Assertion):
+    validate = Assertion._require_mapping
+
+    def check(self, response, status_code, matches=None):
+        return Assertions.assert_response_any(actual_results=response, expected_results=self.expected)
+
+
+@register_assertion('db')
+class DatabaseAssertion(Assertion):
+    def validate(self):
+        if not isinstance(self.expected, str) or not self.expected.strip():
+            raise ValueError(f'"db" assertion expects an SQL query string, got {self.expected!r}')
+
+    def check(self, response, status_code, matches=None):
+        return Assertions.assert_mysql_data(self.expected)
+
+
+@register_assertion('redis')
+class RedisAssertion(Assertion):
+    """
+    Cache checks, all sent in one pipelined round trip:
+
+        - redis:
+            get: { 'user:1:name': 'Tom' }          # value (null: key absent)
+            hgetall: { 'user:1': { 'age': 18 } }   # listed fields only
+            exists: { 'session:abc': true }
+            ttl: { 'session:abc': 3600 }           # expires within 3600s (-1: no expiry)
+    """
+    COMMANDS = ('get', 'hgetall', 'exists', 'ttl')
+
+    def validate(self):
+        self._require_mapping()
+        for command, keys in self.expected.items():
+            if command not in self.COMMANDS:
+                raise ValueError(f'"redis" assertion supports {list(self.COMMANDS)}, got "{command}"')
+            if not isinstance(keys, dict) or not keys:
+                raise ValueError(f'"redis" {command} expects a non-empty mapping of key -> expected value')
+
+    def check(self, response, status_code, matches=None):
+        return Assertions.assert_redis_data(self.expected)
+
+
+class ValidationPlan:
+    """
+    A validation block compiled into Assertion objects. Plans hold no state
+    between runs, so one plan is shared by every execution of its case and is
+    pickled into the case cache together with the parsed YAML.
+    """
+    __slots__ = ('rules', 'raw')
+
+    def __init__(self, rules, raw):
+        self.rules = rules
+        self.raw = raw
+
+    def paths(self):
+        return [path for rule in self.rules for path in rule.paths()]
+
+    def check(self, response, status_code, matches=None):
+        return sum(rule.check(response, status_code, matches) for rule in self.rules)
+
+    def __repr__(self):
+        return repr(self.raw)
+
+
+def compile_validation(validation):
+    """
+    Compile a rendered validation block (list of `{type: expected}` items, or
+    its string form) into a ValidationPlan. Raises ValueError for unknown
+    assertion types and malformed rules.
+    """
+    if isinstance(validation, ValidationPlan):
+        return validation
+    if validation is None:
+        return ValidationPlan([], [])
+    if isinstance(validation, str):
+        try:
+            validation = ast.literal_eval(validation)
+        except (ValueError, SyntaxError):
+            raise ValueError(f'validation is not a literal list: {validation!r}') from None
+    if not isinstance(validation, list):
+        raise ValueError(f'validation must be a list of assertions, got {type(validation).__name__}')
+
+    rules = []
+    for item in validation:
+        if not isinstance(item, dict):
+            raise ValueError(f'validation item must be a mapping, got {item!r}')
+        for kind, expected in item.items():
+            try:
+                rules.append(ASSERTION_TYPES[kind](expected))
+            except KeyError:
+                raise ValueError(
+                    f'unsupported assertion type "{kind}", expected one of {sorted(ASSERTION_TYPES)}') from None
+    return ValidationPlan(rules, validation)
+
+
+def precompile_validation(validation):
+    """
+    Compile a validation block at load time. Blocks holding ${...} placeholders
+    are returned unchanged and compiled after rendering, at run time.
+    """
+    if compile_template(validation) is not None:
+        return validation
+    return compile_validation(validation)
 
 
 class Assertions:
@@ -14,16 +212,25 @@ class Assertions:
     3) Inequality assertion
     4) Any value assertion
     5) Database assertion
+    6) Redis assertion
+    7) Key presence assertion (inc)
+    Further types can be added with the register_assertion decorator.
     """
 
     @staticmethod
-    def contains_assert(value, response, status_code):
+    def validation_paths(validation):
+        """JSONPath expressions the assertions of a validation block will evaluate."""
+        return compile_validation(validation).paths()
+
+    @staticmethod
+    def contains_assert(value, response, status_code, matches=None):
         """
         String contains assertion: checks if expected string exists in API response.
         :param status_code:
         :param value: Expected result from YAML
         :param response: Actual API response
         :param status_code:  status code
+        :param matches: precomputed JSONPath results (expression -> matches)
         :return: Flag, 0=success, >0=failure
         """
         flag = 0
@@ -31,11 +238,15 @@ class Assertions:
             if assert_key == "status_code":
                 if assert_value != status_code:
                     flag += 1
-                    allure.attach(f"Expected: {assert_value}\nActual: {status_code}", 'Status code assertion failed',
+                    attachments.attach(f"Expected: {assert_value}\nActual: {status_code}", 'Status code assertion failed',
                                   attachment_type=allure.attachment_type.TEXT)
                     logs.error("Contains assertion failed: status code [%s] != [%s]" % (status_code, assert_value))
             else:
-                resp_list = jsonpath.jsonpath(response, "$..%s" % assert_key)
+                expr = "$..%s" % assert_key
+                if matches is not None and expr in matches:
+                    resp_list = matches[expr] or False
+                else:
+                    resp_list = json_path.jsonpath(response, expr)
                 if isinstance(resp_list[0], str):
                     resp_list = ''.join(resp_list)
                 if resp_list:
@@ -44,11 +255,36 @@ class Assertions:
                         logs.info("String contains assertion passed: expected [%s], actual [%s]" % (assert_value, resp_list))
                     else:
                         flag += 1
-                        allure.attach(f"Expected: {assert_value}\nActual: {resp_list}", 'Text assertion failed',
+                        attachments.attach(f"Expected: {assert_value}\nActual: {resp_list}", 'Text assertion failed',
                                       attachment_type=allure.attachment_type.TEXT)
                         logs.error("Text assertion failed: expected [%s], actual [%s]" % (assert_value, resp_list))
         return flag
 
+    @staticmethod
+    def include_assert(exprs, response, matches=None):
+        """
+        Key presence assertion: every `$..key` expression must match somewhere in the response.
+        :param exprs: `$..key` expressions built from the YAML key names
+        :param response: Actual API response
+        :param matches: precomputed JSONPath results (expression -> matches)
+        :return: Flag, 0=success, >0=failure
+        """
+        flag = 0
+        for expr in exprs:
+            if matches is not None and expr in matches:
+                found = matches[expr]
+            else:
+                found = json_path.jsonpath(response, expr)
+            key = expr[3:]
+            if found:
+                logs.info("Key presence assertion passed: [%s] found in response" % key)
+            else:
+                flag += 1
+                attachments.attach(f"Expected key: {key}\nActual: {response}", 'Key presence assertion failed',
+                                   attachment_type=allure.attachment_type.TEXT)
+                logs.error("Key presence assertion failed: [%s] not found in response" % key)
+        return flag
+
     @staticmethod
     def equal_assert(expected_results, actual_results):
         """
@@ -64,12 +300,12 @@ class Assertions:
             eq_assert = operator.eq(new_actual_results, expected_results)
             if eq_assert:
                 logs.info(f"Equality assertion passed: actual {new_actual_results} equals expected {expected_results}")
-                allure.attach(f"Expected: {expected_results}\nActual: {new_actual_results}", 'Equality assertion passed',
+                attachments.attach(f"Expected: {expected_results}\nActual: {new_actual_results}", 'Equality assertion passed',
                               attachment_type=allure.attachment_type.TEXT)
             else:
                 flag += 1
                 logs.error(f"Equality assertion failed: actual {new_actual_results} != expected {expected_results}")
-                allure.attach(f"Expected: {expected_results}\nActual: {new_actual_results}", 'Equality assertion failed',
+                attachments.attach(f"Expected: {expected_results}\nActual: {new_actual_results}", 'Equality assertion failed',
                               attachment_type=allure.attachment_type.TEXT)
         else:
             raise TypeError('Equality assertion: both expected and actual results must be dicts!')
@@ -87,12 +323,12 @@ class Assertions:
             eq_assert = operator.ne(new_actual_results, expected_results)
             if eq_assert:
                 logs.info(f"Inequality assertion passed: actual {new_actual_results} != expected {expected_results}")
-                allure.attach(f"Expected: {expected_results}\nActual: {new_actual_results}", 'Inequality assertion passed',
+                attachments.attach(f"Expected: {expected_results}\nActual: {new_actual_results}", 'Inequality assertion passed',
                               attachment_type=allure.attachment_type.TEXT)
             else:
                 flag += 1
                 logs.error(f"Inequality assertion failed: actual {new_actual_results} equals expected {expected_results}")
-                allure.attach(f"Expected: {expected_results}\nActual: {new_actual_results}", 'Inequality assertion failed',
+                attachments.attach(f"Expected: {expected_results}\nActual: {new_actual_results}", 'Inequality assertion failed',
                               attachment_type=allure.attachment_type.TEXT)
         else:
             raise TypeError('Inequality assertion: both expected and actual results must be dicts!')
@@ -138,6 +374,8 @@ class Assertions:
         Database assertion: check if query returns expected results.
         :return: 0=success, >0=failure
         """
+        # Database drivers are only needed by suites that use db assertions
+        from common.connection import MysqlConnection
         flag = 0
         conn = MysqlConnection()
         db_value = conn.execute_query(expected_results)
@@ -148,32 +386,53 @@ class Assertions:
             logs.error("Database assertion failed: data not found")
         return flag
 
-    def assert_result(self, expected, response, status_code):
+    @staticmethod
+    def redis_matches(command, expected, actual):
+        """Compare one Redis batch result with the value expected in YAML."""
+        if isinstance(actual, Exception):
+            return False
+        if command == 'get':
+            return actual is None if expected is None else actual == str(expected)
+        if command == 'hgetall':
+            return all(actual.get(str(field)) == str(value) for field, value in expected.items())
+        if command == 'exists':
+            return bool(actual) == bool(expected)
+        # ttl: -1 means the key must not expire, otherwise it must expire within the given seconds
+        expected = int(expected)
+        return actual == -1 if expected == -1 else 0 < actual <= expected
+
+    @staticmethod
+    def assert_redis_data(expected_results):
+        """
+        Redis assertion: run every GET/HGETALL/EXISTS/TTL of the rule in one pipeline.
+        :return: 0=success, >0=failure
+        """
+        # Only suites that use redis assertions need the redis driver
+        from common.connection import RedisConnection
+        checks = [(command, key, value) for command, keys in expected_results.items() for key, value in keys.items()]
+        results = RedisConnection().batch((command, key) for command, key, _ in checks)
+
+        flag = 0
+        for (command, key, value), actual in zip(checks, results):
+            if Assertions.redis_matches(command, value, actual):
+                logs.info(f"Redis assertion passed: {command} {key} = {actual}")
+            else:
+                flag += 1
+                logs.error(f"Redis assertion failed: {command} {key}, expected [{value}], actual [{actual}]")
+                attachments.attach(f"Command: {command} {key}\nExpected: {value}\nActual: {actual}",
+                              'Redis assertion failed', attachment_type=allure.attachment_type.TEXT)
+        return flag
+
+    def assert_result(self, expected, response, status_code, matches=None):
         """
-        Main assertion method: checks all assertion types. all_flag=0 means pass.
+        Main assertion method: runs every rule of the validation block. all_flag=0 means pass.
+        :param expected: ValidationPlan, or a raw validation block compiled on the fly
+        :param matches: precomputed JSONPath results shared with extraction (optional)
         """
-        all_flag = 0
         try:
-            logs.info("Expected results from YAML: %s" % expected)
-            for yq in expected:
-                for key, value in yq.items():
-                    if key == "contains":
-                        flag = self.contains_assert(value, response, status_code)
-                        all_flag += flag
-                    elif key == "eq":
-                        flag = self.equal_assert(value, response)
-                        all_flag += flag
-                    elif key == 'ne':
-                        flag = self.not_equal_assert(value, response)
-                        all_flag += flag
-                    elif key == 'rv':
-                        flag = self.assert_response_any(actual_results=response, expected_results=value)
-                        all_flag += flag
-                    elif key == 'db':
-                        flag = self.assert_mysql_data(value)
-                        all_flag += flag
-                    else:
-                        logs.error("Unsupported assertion type")
+            plan = compile_validation(expected)
+            logs.info("Expected results from YAML: %s" % plan.raw)
+            all_flag = plan.check(response, status_code, matches)
         except Exception as exceptions:
             logs.error('Assertion error: check YAML expected values!')
             raise exceptions
@@ -0,0 +1,90 @@
+"""Content-addressed Allure attachments.
+
+allure.attach writes every attachment to a new <uuid>-attachment.<ext> file,
+so identical bodies (static lists, error envelopes, shared headers) are
+stored once per test. The store names the file after the SHA-256 of its
+content instead, writes each distinct blob once and adds a reference to it
+to every test result that attaches it. Bodies are stored as they are, so the
+report shows them inline; setting.ALLURE_GZIP_BYTES (off by default) stores
+bodies of that size or more gzipped instead (<sha256>-attachment.<ext>.gz,
+downloaded from the report as a gzip file).
+
+Without allure-pytest (no --alluredir) attachments fall back to allure.attach.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+
+import allure
+from allure_commons.model2 import ATTACHMENT_PATTERN, Attachment, ExecutableItem
+from allure_commons.types import AttachmentType
+
+from conf import setting
+
+
+class AttachmentStore:
+
+    def __init__(self):
+        self.config = None
+        self.written = set()
+
+    def configure(self, config):
+        """Remember the pytest config; the allure listener is looked up at the first attach."""
+        self.config = config
+        self.written.clear()
+
+    def _target(self):
+        """(report dir, allure reporter) of the running session, or None."""
+        if self.config is None:
+            return None
+        report_dir = self.config.getoption('allure_report_dir', None)
+        listener = self.config.pluginmanager.get_plugin('allure_listener')
+        if not report_dir or listener is None:
+            return None
+        return report_dir, listener.allure_logger
+
+    @staticmethod
+    def _resolve_type(attachment_type, extension):
+        if isinstance(attachment_type, AttachmentType):
+            return attachment_type.extension, attachment_type.mime_type
+        return extension or 'attach', attachment_type
+
+    def _store(self, report_dir, data, extension):
+        """Write a blob once; returns its file name in the report directory."""
+        digest = hashlib.sha256(data).hexdigest()
+        compress = setting.ALLURE_GZIP_BYTES and len(data) >= setting.ALLURE_GZIP_BYTES
+        file_name = ATTACHMENT_PATTERN.format(prefix=digest, ext=extension + ('.gz' if compress else ''))
+        if file_name in self.written:
+            return file_name
+        path = os.path.join(report_dir, file_name)
+        if not os.path.exists(path):
+            # Same name means same content, concurrent writers may race harmlessly
+            tmp = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=6) if compress else data)
+            os.replace(tmp, path)
+        self.written.add(file_name)
+        return file_name
+
+    def attach(self, body, name=None, attachment_type=allure.attachment_type.TEXT, extension=None):
+        target = self._target()
+        item = target[1].get_last_item(ExecutableItem) if target else None
+        if item is None:
+            allure.attach(body, name, attachment_type, extension)
+            return
+        if isinstance(body, (bytes, bytearray)):
+            data = bytes(body)
+        else:
+            # bytes() of an int would be that many zero bytes
+            data = str(body).encode('utf-8')
+        extension, mime_type = self._resolve_type(attachment_type, extension)
+        file_name = self._store(target[0], data, extension)
+        if file_name.endswith('.gz'):
+            mime_type = 'application/gzip'
+            name = f'{name} (gzip)'
+        item.attachments.append(Attachment(source=file_name, name=name, type=mime_type))
+
+
+attachment_store = AttachmentStore()
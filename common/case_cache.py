@@ -0,0 +1,91 @@
+"""On-disk cache of parsed YAML test cases.
+
+Each test file gets one pickle under FILE_PATH['CASE_CACHE'] holding the
+file's mtime, size, SHA-256 digest and its parsed, validated cases. A file
+is only read and hashed when its mtime or size changed, and only re-parsed
+when its content hash changed too, so collection cost follows the number of
+edited files rather than the size of the suite.
+"""
+
+import hashlib
+import os
+import pickle
+
+import yaml
+
+from common.record_log import logs
+from conf.setting import FILE_PATH
+
+# Bump when the cached structure changes so stale entries are ignored
+CACHE_VERSION = 2
+
+# libyaml's C loader is several times faster than the pure-Python one
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class CaseCache:
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or FILE_PATH['CASE_CACHE']
+
+    def _entry_path(self, file):
+        key = hashlib.sha1(os.path.abspath(file).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + '.pickle')
+
+    def _read_entry(self, entry_path):
+        try:
+            with open(entry_path, 'rb') as f:
+                entry = pickle.load(f)
+            if entry.get('version') == CACHE_VERSION:
+                return entry
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logs.warning(f'Ignoring unreadable case cache entry {entry_path}: {e}')
+        return None
+
+    def _write_entry(self, entry_path, entry):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f'{entry_path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, entry_path)
+        except Exception as e:
+            logs.warning(f'Could not write case cache entry {entry_path}: {e}')
+
+    def load(self, file, build):
+        """
+        Return the cases of a YAML file, parsing it only when it changed.
+        :param file: YAML test file
+        :param build: callable turning the parsed YAML document into cases
+        :return: freshly unpickled (or built) cases, safe for callers to mutate
+        """
+        stat = os.stat(file)
+        entry_path = self._entry_path(file)
+        entry = self._read_entry(entry_path)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry['cases']
+
+        with open(file, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if entry and entry['digest'] == digest:
+            # Touched but unchanged: only the stat key is refreshed
+            cases = entry['cases']
+        else:
+            cases = build(yaml.load(raw.decode('utf-8'), Loader=SafeLoader))
+            logs.debug(f'Case cache: parsed {file}')
+
+        self._write_entry(entry_path, {
+            'version': CACHE_VERSION,
+            'path': os.path.abspath(file),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'digest': digest,
+            'cases': cases,
+        })
+        return cases
+
+
+case_cache = CaseCache()
@@ -4,145 +4,543 @@ This module provides lightweight wrapper classes for connecting to and
 interacting with common services used in tests: MySQL, Redis, ClickHouse,
 MongoDB, and SSH. Each wrapper handles simple operations and ensures
 resources are closed where appropriate.
+
+MySQL connections come from one session-wide MysqlPool (sized by
+`setting.MYSQL_POOL`) instead of being opened and closed per query.
+
+Drivers are imported on first use (see _LazyModule): importing this module
+costs nothing for suites that never touch a database.
 """
 
+import contextlib
+import contextvars
+import importlib
+import re
 import sys
+import threading
+import time
 import traceback
-import pymongo
-import pandas as pd
-import pymysql
-import redis
-from clickhouse_sqlalchemy import make_session
-from sqlalchemy import create_engine
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from conf import setting
 from conf.operator_config import OperatorConfig
 from common.record_log import logs
-import paramiko
 
 conf = OperatorConfig()
 
-class MysqlConnection:
-    """Simple MySQL connection wrapper.
 
-    Connects using configuration from `conf` and exposes helper methods
-    to execute queries and close the connection.
+class _LazyModule:
+    """Stand-in for a driver module that imports it on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        # importlib caches the module in sys.modules, later lookups are cheap
+        return getattr(importlib.import_module(self._name), attr)
+
+    def __repr__(self):
+        return f'<lazy module {self._name}>'
+
+
+np = _LazyModule('numpy')
+pd = _LazyModule('pandas')
+pymongo = _LazyModule('pymongo')
+pymysql = _LazyModule('pymysql')
+redis = _LazyModule('redis')
+paramiko = _LazyModule('paramiko')
+sqlalchemy = _LazyModule('sqlalchemy')
+clickhouse_sqlalchemy = _LazyModule('clickhouse_sqlalchemy')
+
+# Innermost _TransactionScope of the current test/context (MysqlPool.transaction/isolation)
+_bound_mysql = contextvars.ContextVar('bound_mysql_connection', default=None)
+
+# Rows fetched per round of an unbuffered (server-side) cursor
+STREAM_BATCH_SIZE = 1000
+
+# Rows per DataFrame yielded by ClickHouseConnection.iter_query
+CLICKHOUSE_CHUNK_ROWS = 50000
+
+_SELECT_PATTERN = re.compile(r'^\s*(select|with)\b', re.I)
+# A LIMIT/OFFSET count: a number or a pymysql placeholder (%s, %(name)s)
+_LIMIT_VALUE = r'(\d+|%s|%\(\w+\)s)'
+# Clauses after which (or instead of which) LIMIT 1 must not be appended
+_NO_LIMIT_PATTERN = re.compile(
+    rf'\blimit\s+{_LIMIT_VALUE}(\s*,\s*{_LIMIT_VALUE})?(\s+offset\s+{_LIMIT_VALUE})?\s*$'
+    r'|\bfor\s+(update|share)\b[^)]*$|\block\s+in\s+share\s+mode\s*$',
+    re.I)
+
+
+def limit_one(query):
+    """Append LIMIT 1 to a SELECT that does not already limit its rows."""
+    query = query.strip().rstrip(';').rstrip()
+    if _SELECT_PATTERN.match(query) and not _NO_LIMIT_PATTERN.search(query):
+        query += ' LIMIT 1'
+    return query
+
+
+def mysql_config():
+    """pymysql.connect() arguments read from the MYSQL section of config.ini."""
+    return {
+        'host': conf.get_section_mysql('host'),
+        'port': int(conf.get_section_mysql('port')),
+        'user': conf.get_section_mysql('username'),
+        'password': conf.get_section_mysql('password'),
+        'database': conf.get_section_mysql('database'),
+        'charset': 'utf8',
+    }
+
+
+class _TransactionScope:
+    """
+    One level of MysqlPool.transaction()/isolation(). The outermost scope
+    owns a pooled connection and a transaction; nested scopes are savepoints
+    on it. Scopes connect lazily, on the first query made inside them.
     """
-    def __init__(self):
-        """Open a MySQL connection and create a dict cursor.
 
-        Reads connection parameters from configuration and attempts to
-        establish a connection. On failure `self.connection` is set to None.
+    def __init__(self, pool, parent, rollback, isolation_level=None):
+        self.pool = pool
+        self.parent = parent
+        self.rollback = rollback
+        # Isolation level of the outermost transaction, e.g. 'READ COMMITTED'
+        self.isolation_level = isolation_level
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.conn = None
+
+    @property
+    def savepoint(self):
+        return f'tf_sp_{self.depth}'
+
+    def connect(self):
+        if self.conn is None:
+            if self.parent is not None:
+                conn = self.parent.connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(f'SAVEPOINT {self.savepoint}')
+            else:
+                conn = self.pool.acquire()
+                if self.isolation_level:
+                    # Applies to the next transaction only, the pooled session keeps its default
+                    with conn.cursor() as cursor:
+                        cursor.execute(f'SET TRANSACTION ISOLATION LEVEL {self.isolation_level}')
+                conn.begin()
+            self.conn = conn
+        return self.conn
+
+    def finish(self, failed):
+        conn, self.conn = self.conn, None
+        if conn is None:
+            # Nothing ran inside the scope, no connection was ever taken
+            return
+        undo = failed or self.rollback
+        if self.parent is not None:
+            with conn.cursor() as cursor:
+                if undo:
+                    cursor.execute(f'ROLLBACK TO SAVEPOINT {self.savepoint}')
+                cursor.execute(f'RELEASE SAVEPOINT {self.savepoint}')
+            return
+
+        broken = True
+        try:
+            conn.rollback() if undo else conn.commit()
+            broken = False
+        finally:
+            self.pool.release(conn, discard=broken)
+
+
+class MysqlPool:
+    """Bounded, thread-safe pool of autocommit pymysql connections.
+
+    Connections are opened lazily up to `max_size`; callers beyond that wait
+    up to `timeout` seconds for one to be returned. A connection that sat
+    idle longer than `ping_interval` is pinged (and reconnected) before it is
+    handed out, and connections that failed with a connection-level error
+    are dropped instead of being returned to the pool.
+    """
+
+    def __init__(self, mysql_conf=None, pool_conf=None):
+        pool_conf = dict(setting.MYSQL_POOL if pool_conf is None else pool_conf)
+        self.mysql_conf = mysql_conf or mysql_config()
+        self.max_size = pool_conf.get('max_size', 10)
+        self.timeout = pool_conf.get('timeout', 30)
+        self.ping_interval = pool_conf.get('ping_interval', 30)
+        self._idle = deque()  # (connection, last_used) pairs, most recent last
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.created = 0
+        self.checkouts = 0
+
+    def _connect(self):
+        conn = pymysql.connect(**self.mysql_conf, autocommit=True)
+        self.created += 1
+        logs.info(f"Connected to MySQL database {self.mysql_conf['database']} successfully.")
+        return conn
+
+    def acquire(self):
+        """Check a connection out of the pool; pair every call with release()."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError('MySQL pool is closed')
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f'No MySQL connection free within {self.timeout}s (max_size={self.max_size})')
+                self._cond.wait(remaining)
+            self.checkouts += 1
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif time.monotonic() - last_used > self.ping_interval:
+                conn.ping(reconnect=True)
+        except Exception:
+            self._discard(conn)
+            raise
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection; discard=True closes it instead (e.g. after a connection error)."""
+        if discard or self._closed:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, conn):
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @contextlib.contextmanager
+    def connection(self):
         """
-        mysql_conf = {
-            'host': conf.get_section_mysql('host'),
-            'port': int(conf.get_section_mysql('port')),
-            'user': conf.get_section_mysql('username'),
-            'password': conf.get_section_mysql('password'),
-            'database': conf.get_section_mysql('database')
-        }
+        Check out a connection for several queries. Inside transaction() or
+        isolation() the connection bound to the current context is reused.
+        """
+        scope = _bound_mysql.get()
+        if scope is not None and scope.pool is self:
+            yield scope.connect()
+            return
 
+        conn = self.acquire()
+        broken = False
         try:
-            # Create connection and a dict cursor for easy column access
-            self.connection = pymysql.connect(
-                **mysql_conf,
-                charset='utf8'
-            )
-            self.cursor = self.connection.cursor(cursor=pymysql.cursors.DictCursor)
-            logs.info(f"Connected to MySQL database {mysql_conf['database']} successfully.")
-        except Exception as e:
-            logs.error(f"Failed to connect to MySQL database: {e}")
-            self.connection = None
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError, GeneratorExit):
+            # GeneratorExit: a stream was abandoned with unread rows on the wire
+            broken = True
+            raise
+        finally:
+            self.release(conn, discard=broken)
+
+    @contextlib.contextmanager
+    def _scope(self, rollback, lazy, isolation_level=None):
+        parent = _bound_mysql.get()
+        scope = _TransactionScope(self, parent if parent is not None and parent.pool is self else None,
+                                  rollback, isolation_level)
+        token = _bound_mysql.set(scope)
+        failed = True
+        try:
+            if not lazy:
+                scope.connect()
+            yield scope
+            failed = False
+        finally:
+            _bound_mysql.reset(token)
+            scope.finish(failed)
+
+    @contextlib.contextmanager
+    def transaction(self, rollback=False):
+        """
+        Run every pooled query of the current context (e.g. one test) in a
+        single transaction: committed on success, rolled back on error, or
+        always rolled back with rollback=True. A nested call becomes a
+        savepoint of the outer transaction.
+        """
+        with self._scope(rollback, lazy=False) as scope:
+            yield scope.conn
+
+    @contextlib.contextmanager
+    def isolation(self):
+        """
+        Roll back every pooled query of the current context when it ends.
+        The connection is only checked out (and BEGIN sent) by the first
+        query, so contexts that never touch MySQL cost nothing. Inside an
+        open transaction() it is a savepoint.
+
+        The transaction runs at setting.DB_ISOLATION_LEVEL (READ COMMITTED):
+        every `db` assertion sees the rows the application under test has
+        committed so far, instead of the REPEATABLE READ snapshot taken by
+        the first one. Rows the test itself wrote stay locked until the
+        rollback, so the application blocks on them (up to
+        innodb_lock_wait_timeout) if it updates the same rows.
+        """
+        with self._scope(rollback=True, lazy=True, isolation_level=setting.DB_ISOLATION_LEVEL):
+            yield
+
+    @staticmethod
+    def in_transaction():
+        """True when the current context runs inside transaction() or isolation()."""
+        return _bound_mysql.get() is not None
+
+    def stats(self):
+        return {'size': self._size, 'idle': len(self._idle), 'created': self.created, 'checkouts': self.checkouts}
+
+    def close(self):
+        """Close idle connections; connections still checked out are closed on release."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+_mysql_pool = None
+_mysql_pool_lock = threading.Lock()
+
+
+def get_mysql_pool():
+    """Return the process-wide MySQL pool, creating it on first use."""
+    global _mysql_pool
+    if _mysql_pool is None:
+        with _mysql_pool_lock:
+            if _mysql_pool is None:
+                _mysql_pool = MysqlPool()
+    return _mysql_pool
+
+
+def close_mysql_pool():
+    """Log pool statistics and close the shared pool (session end)."""
+    global _mysql_pool
+    with _mysql_pool_lock:
+        if _mysql_pool is None:
+            return
+        stats = _mysql_pool.stats()
+        logs.info('MySQL pool: %(checkouts)s checkouts served by %(created)s connections' % stats)
+        _mysql_pool.close()
+        _mysql_pool = None
+
+
+class MysqlConnection:
+    """MySQL helper on top of the shared connection pool.
+
+    Each call checks a pooled connection out and back in. Use the instance
+    as a context manager to run several queries on one checkout:
+
+        with MysqlConnection() as db:
+            db.delete_query(...)
+            db.execute_query(...)
+    """
+    def __init__(self, pool=None):
+        self.pool = pool or get_mysql_pool()
+        self._checkout = None
+        self.connection = None
+
+    def __enter__(self):
+        self._checkout = self.pool.connection()
+        self.connection = self._checkout.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        checkout, self._checkout, self.connection = self._checkout, None, None
+        return checkout.__exit__(exc_type, exc_val, exc_tb)
+
+    @contextlib.contextmanager
+    def _connection(self):
+        if self.connection is not None:
+            yield self.connection
+        else:
+            with self.pool.connection() as conn:
+                yield conn
+
+    @contextlib.contextmanager
+    def _cursor(self):
+        with self._connection() as conn, conn.cursor(pymysql.cursors.DictCursor) as cursor:
+            yield cursor
 
     def close(self):
-        """Close cursor and connection if open."""
-        if self.connection:
-            self.cursor.close()
-            self.connection.close()
-            logs.info("MySQL connection closed.")
+        """Kept for compatibility: pooled connections are returned, not closed."""
+
+    def query_first(self, query, args=None):
+        """First row of a query as a dict (None when empty), fetched with LIMIT 1."""
+        with self._cursor() as cursor:
+            cursor.execute(limit_one(query), args)
+            return cursor.fetchone()
+
+    def exists(self, query, args=None):
+        """True if the query returns at least one row; only one row is transferred."""
+        return self.query_first(query, args) is not None
+
+    def stream_batches(self, query, batch_size=STREAM_BATCH_SIZE, args=None):
+        """
+        Yield the rows of a query as lists of at most batch_size dicts, read
+        through an unbuffered server-side cursor so only one batch is held in
+        memory. The connection stays checked out until the generator ends.
+        """
+        with self._connection() as conn:
+            # Only a connection nobody else uses can be dropped instead of drained
+            private = self.connection is None and not self.pool.in_transaction()
+            cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+            abandoned = False
+            try:
+                cursor.execute(query, args)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+            except GeneratorExit:
+                abandoned = private
+                raise
+            finally:
+                # Closing an unbuffered cursor reads the remaining rows; when the
+                # caller stopped early on a private connection, the pool drops it instead
+                if not abandoned:
+                    cursor.close()
+
+    def stream_query(self, query, args=None, batch_size=STREAM_BATCH_SIZE):
+        """Yield the rows of a query one dict at a time (see stream_batches)."""
+        for rows in self.stream_batches(query, batch_size, args):
+            yield from rows
 
     def execute_query(self, query):
-        """Execute a SELECT query and return the first row as a list-of-values.
+        """Execute a query and return its first row as a list-of-values.
 
-        The original code collects rows, converts each row dict to a list of
-        values and returns the first formatted row wrapped in a list. If no
-        connection or an error occurs, returns None.
+        Only the first row is fetched (SELECTs get LIMIT 1) and returned as
+        [[value, ...]]. If there are no rows or an error occurs, returns None.
         """
         try:
-            if self.connection is None:
-                logs.error("No MySQL connection available.")
-                return None
-            # Execute the provided query and commit any transactional changes
-            self.cursor.execute(query)
-            self.connection.commit()
-            res = self.cursor.fetchall()
-
-            values = []
-
-            for ite in res:
-                # Convert each row (dict) to a list of values preserving column order
-                values.append(list(ite.values()))
-
-            for val in values:
-                lst_format = [
-                    val
-                ]
-                # Return only the first formatted row as in original implementation
-                return lst_format
+            # Pool connections autocommit, inside transaction() nothing is committed here
+            row = self.query_first(query)
+            if row is not None:
+                # Row values in column order
+                return [list(row.values())]
+            return None
         except Exception as e:
             logs.error(f"Error executing MySQL query: {e}")
             return None
-        finally:
-            # Ensure resources are closed regardless of outcome
-            self.close()
 
     def delete_query(self, query):
-        """Execute a DELETE (or other write) SQL statement and commit.
+        """Execute a DELETE (or other write) SQL statement.
 
-        Closes the connection after execution. Returns None but logs errors.
+        Committed immediately, or with the enclosing transaction() when one
+        is bound. Returns None but logs errors.
         """
         try:
-            if self.connection is None:
-                logs.error("No MySQL connection available.")
-                return None
-            # Execute and commit a modifying query
-            self.cursor.execute(query)
-            self.connection.commit()
+            with self._cursor() as cursor:
+                cursor.execute(query)
             logs.info("Delete query executed successfully.")
         except Exception as e:
             logs.error(f"Error executing delete query: {e}")
-        finally:
-            self.close()
+
+
+_redis_pools = {}
+_redis_lock = threading.Lock()
+
+
+def get_redis_pool(host, port, db=0, username=None, password=None):
+    """One connection pool per Redis server/db for the whole session."""
+    key = (host, int(port), db, username, password)
+    pool = _redis_pools.get(key)
+    if pool is None:
+        with _redis_lock:
+            pool = _redis_pools.get(key)
+            if pool is None:
+                kwargs = {'username': username} if username else {}
+                # decode_responses must be set on the pool, the client ignores it when given a pool
+                pool = redis.ConnectionPool(host=host, port=int(port), db=db, password=password or None,
+                                            decode_responses=True, **kwargs)
+                _redis_pools[key] = pool
+    return pool
+
+
+def close_redis_pools():
+    """Disconnect every cached Redis pool (session end)."""
+    with _redis_lock:
+        pools = list(_redis_pools.values())
+        _redis_pools.clear()
+    for pool in pools:
+        pool.disconnect()
 
 
 class RedisConnection:
     """Redis connection helper.
 
     Wraps a Redis client created from configuration and exposes common
-    operations like set/get and hash helpers.
+    operations like set/get and hash helpers, plus batch reads that cost a
+    single round trip (get_many, hgetall_many, exists_many, ttl_many).
     """
-    def __init__(self, ip=conf.get_section_redis("host"), port=conf.get_section_redis("port"), username=None,
-                 passwd=None, db=conf.get_section_redis("db")):
-        """Create a connection pool and Redis client instance.
+    def __init__(self, ip=None, port=None, username=None, passwd=None, db=None):
+        """Create a Redis client on the shared pool for this server.
 
+        ip, port and db default to the REDIS config section.
         decode_responses=True is used so operations return strings instead
         of bytes.
         """
-        self.host = ip
-        self.port = port
+        self.host = ip if ip is not None else conf.get_section_redis("host")
+        self.port = port if port is not None else conf.get_section_redis("port")
         self.username = username
         self.password = passwd
-        self.db = db
+        self.db = db if db is not None else conf.get_section_redis("db")
 
         try:
-            pool = redis.ConnectionPool(
-                host=self.host,
-                port=int(self.port),
-                password=self.password
-            )
+            # config.ini writes the database as "db0" or "0"
+            db_index = int(re.sub(r'\D', '', str(self.db)) or 0) if self.db is not None else 0
+            pool = get_redis_pool(self.host, self.port, db_index, self.username, self.password)
             # Client using the connection pool
-            self.first_conn = redis.Redis(connection_pool=pool,decode_responses=True)
+            self.first_conn = redis.Redis(connection_pool=pool)
         except Exception:
             logs.error(str(traceback.format_exc()))
 
+    def batch(self, operations):
+        """Run many commands in one pipelined round trip.
+
+        :param operations: iterable of (command, *args), e.g. ('hgetall', 'user:1')
+        :return: list of results in the same order; a failing command yields
+            its exception instead of aborting the batch
+        """
+        pipe = self.first_conn.pipeline(transaction=False)
+        for command, *args in operations:
+            getattr(pipe, command)(*args)
+        return pipe.execute(raise_on_error=False)
+
+    def _batch_by_key(self, command, keys):
+        keys = list(keys)
+        return dict(zip(keys, self.batch((command, key) for key in keys)))
+
+    def get_many(self, keys):
+        """Values of many string keys (None when missing) with one MGET."""
+        keys = list(keys)
+        return dict(zip(keys, self.first_conn.mget(keys))) if keys else {}
+
+    def hgetall_many(self, keys):
+        """Every field of many hashes in one round trip."""
+        return self._batch_by_key('hgetall', keys)
+
+    def exists_many(self, keys):
+        """key -> bool for many keys in one round trip."""
+        return {key: bool(value) for key, value in self._batch_by_key('exists', keys).items()}
+
+    def ttl_many(self, keys):
+        """key -> TTL in seconds (-1 no expiry, -2 missing) in one round trip."""
+        return self._batch_by_key('ttl', keys)
+
     def set_kv(self,key,value,expire=None):
         """Set a key with optional expiration (seconds).
 
@@ -195,8 +593,54 @@ class RedisConnection:
         except Exception:
             logs.error(str(traceback.format_exc()))
 
+def columns_frame(fields, rows):
+    """Build a DataFrame from row tuples one column array at a time.
+
+    Numeric columns become typed NumPy arrays (object when they hold NULLs);
+    other columns are object arrays that pandas narrows with infer_objects().
+    """
+    arrays = {}
+    for index, column in enumerate(zip(*rows) if rows else [()] * len(fields)):
+        if column and isinstance(column[0], (int, float, np.number)):
+            arrays[index] = np.array(column)
+        else:
+            arrays[index] = np.array(column, dtype=object)
+    df = pd.DataFrame(arrays, copy=False)
+    df.columns = list(fields)
+    return df.infer_objects()
+
+
+_clickhouse_engines = {}
+_clickhouse_lock = threading.Lock()
+
+
+def get_clickhouse_engine(url):
+    """One SQLAlchemy engine (and connection pool) per ClickHouse URL for the whole session."""
+    engine = _clickhouse_engines.get(url)
+    if engine is None:
+        with _clickhouse_lock:
+            engine = _clickhouse_engines.get(url)
+            if engine is None:
+                engine = sqlalchemy.create_engine(url, pool_size=100, pool_recycle=3600, pool_timeout=20)
+                _clickhouse_engines[url] = engine
+    return engine
+
+
+def close_clickhouse_engines():
+    """Dispose every cached ClickHouse engine (session end)."""
+    with _clickhouse_lock:
+        engines = list(_clickhouse_engines.values())
+        _clickhouse_engines.clear()
+    for engine in engines:
+        engine.dispose()
+
+
 class ClickHouseConnection:
-    """ClickHouse connection wrapper using SQLAlchemy engine and session."""
+    """ClickHouse connection wrapper using SQLAlchemy engine and session.
+
+    The engine is shared per URL and the session stays open across queries;
+    call close() when the instance is no longer needed.
+    """
     def __init__(self):
 
         config = {
@@ -207,30 +651,82 @@ class ClickHouseConnection:
             'db': conf.get_section_clickhouse('db'),
             'send_receive_timeout': conf.get_section_clickhouse('timeout')
         }
+        self.session = None
         try:
-            # Build ClickHouse connection URL and create an engine
+            # Build ClickHouse connection URL and reuse its engine
             connection = 'clickhouse://{user}:{password}@{server_host}:{port}/{db}'.format(**config)
-            engine = create_engine(connection, pool_size=100, pool_recycle=3600, pool_timeout=20)
-            self.session = make_session(engine)
+            self.session = clickhouse_sqlalchemy.make_session(get_clickhouse_engine(connection))
         except Exception as e:
             logs.error(f"Failed to connect to ClickHouse database: {e}")
 
+    @staticmethod
+    def _statement(query):
+        return sqlalchemy.text(query) if isinstance(query, str) else query
+
     def execute_query(self, query):
-        """Execute a query and return results as a pandas DataFrame."""
-        cursor = self.session.execute(query)
+        """Execute a query and return results as a pandas DataFrame built column by column."""
+        cursor = self.session.execute(self._statement(query))
         try:
-            fields = cursor.keys()
-            # Map rows to dicts and construct DataFrame
-            df = pd.DataFrame([dict(zip(fields, item)) for item in cursor.fetchall()])
-            return df
+            return columns_frame(cursor.keys(), cursor.fetchall())
         except:
             logs.error(str(traceback.format_exc()))
         finally:
-            # Ensure cursor and session are closed
             cursor.close()
+
+    def iter_query(self, query, chunk_size=CLICKHOUSE_CHUNK_ROWS):
+        """Yield the result of a large query as DataFrames of at most chunk_size rows."""
+        statement = self._statement(query).execution_options(stream_results=True)
+        cursor = self.session.execute(statement)
+        try:
+            fields = list(cursor.keys())
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield columns_frame(fields, rows)
+        finally:
+            cursor.close()
+
+    def close(self):
+        """Close the session; the shared engine keeps its pooled connections."""
+        if self.session is not None:
             self.session.close()
 
 
+_mongo_clients = {}
+_mongo_lock = threading.Lock()
+
+# Documents fetched per round trip by streaming Mongo queries
+MONGO_BATCH_SIZE = 1000
+
+# bulk_write() operation names -> pymongo request classes
+_MONGO_OPERATIONS = {
+    'insert_one': 'InsertOne', 'update_one': 'UpdateOne', 'update_many': 'UpdateMany',
+    'replace_one': 'ReplaceOne', 'delete_one': 'DeleteOne', 'delete_many': 'DeleteMany',
+}
+
+
+def get_mongo_client(uri):
+    """One MongoClient (it pools connections itself) per URI for the whole session."""
+    client = _mongo_clients.get(uri)
+    if client is None:
+        with _mongo_lock:
+            client = _mongo_clients.get(uri)
+            if client is None:
+                client = pymongo.MongoClient(uri)
+                _mongo_clients[uri] = client
+    return client
+
+
+def close_mongo_clients():
+    """Close every cached MongoClient (session end)."""
+    with _mongo_lock:
+        clients = list(_mongo_clients.values())
+        _mongo_clients.clear()
+    for client in clients:
+        client.close()
+
+
 class MongoConnection:
     """MongoDB helper class wrapping pymongo operations for convenience."""
 
@@ -245,9 +741,8 @@ class MongoConnection:
         }
 
         try:
-            # Create a MongoClient and select the configured database
-            client = pymongo.MongoClient(
-                'mongodb://{user}:{passwd}@{host}:{port}/{db}'.format(**mg_conf))
+            # Reuse the session's MongoClient and select the configured database
+            client = get_mongo_client('mongodb://{user}:{passwd}@{host}:{port}/{db}'.format(**mg_conf))
             self.db = client[mg_conf['db']]
             logs.info("Connected to MongoDB database successfully.")
         except Exception as e:
@@ -288,11 +783,27 @@ class MongoConnection:
         except Exception as e:
             logs.error(e)
 
-    def query_all_data(self, collection, query_param=None, limit_num=sys.maxsize):
+    def stream_data(self, collection, query_param=None, projection=None, batch_size=MONGO_BATCH_SIZE, limit_num=0):
+        """Yield matching documents lazily, batch_size per round trip.
+
+        `projection` (e.g. {'_id': 0, 'name': 1}) limits the fields sent
+        back; `limit_num` 0 means no limit.
+        """
+        if query_param is not None and not isinstance(query_param, dict):
+            raise TypeError("query parameters must be of dict type")
+        cursor = self.use_collection(collection).find(query_param, projection, batch_size=batch_size, limit=limit_num)
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+
+    def query_all_data(self, collection, query_param=None, limit_num=sys.maxsize, projection=None,
+                       batch_size=MONGO_BATCH_SIZE):
         """Query multiple documents and return them as a list.
 
         If `query_param` is provided it must be a dict. `limit_num` limits
-        the number of documents returned.
+        the number of documents returned and `projection` the fields of
+        each. Use stream_data() to iterate large results without a list.
         """
         table = self.use_collection(collection)
         if query_param is not None:
@@ -300,32 +811,74 @@ class MongoConnection:
                 raise TypeError("query parameters must be of dict type")
         try:
             # Execute the query and convert the cursor to a list
-            query_results = table.find(query_param).limit(limit_num)  # limit限制结果集查询数量
+            query_results = table.find(query_param, projection, batch_size=batch_size).limit(limit_num)  # limit限制结果集查询数量
             res_list = [res for res in query_results]
             return res_list
         except Exception:
             logs.error(str(traceback.format_exc()))
             return None
 
+    @staticmethod
+    def bulk_request(operation):
+        """
+        Build a pymongo write request from a plain dict, e.g.
+        {'insert_one': {...document...}} or
+        {'update_one': {'filter': {...}, 'update': {'$set': {...}}, 'upsert': True}}.
+        pymongo request objects are returned unchanged.
+        """
+        if not isinstance(operation, dict):
+            return operation
+        if len(operation) != 1 or next(iter(operation)) not in _MONGO_OPERATIONS:
+            raise ValueError(f"bulk operation must be one of {sorted(_MONGO_OPERATIONS)}, got {operation}")
+        name, args = next(iter(operation.items()))
+        request_class = getattr(pymongo, _MONGO_OPERATIONS[name])
+        return request_class(args) if name == 'insert_one' else request_class(**args)
+
+    def bulk_write(self, operations, collection, ordered=False):
+        """Send many inserts/updates/deletes in as few round trips as possible.
+
+        :param operations: pymongo requests or dicts accepted by bulk_request()
+        :param ordered: stop at the first error (True) or apply the rest in any order
+        :return: pymongo BulkWriteResult, or None on error
+        """
+        requests = [self.bulk_request(op) for op in operations]
+        if not requests:
+            return None
+        try:
+            result = self.use_collection(collection).bulk_write(requests, ordered=ordered)
+            logs.info(f"Bulk write on {collection}: {result.bulk_api_result}")
+            return result
+        except Exception as e:
+            logs.error(e)
+            return None
+
+    def upsert(self, query_conditions, after_change, collection):
+        """Update the matching document, or insert it, in one round trip."""
+        if not isinstance(query_conditions, dict) or not isinstance(after_change, dict):
+            raise TypeError("query_conditions and after_change must be of dict type")
+        try:
+            return self.use_collection(collection).update_one(query_conditions, {"$set": after_change}, upsert=True)
+        except Exception as e:
+            logs.error(e)
+            return None
+
     def update_collection(self, query_conditions, after_change, collection):
         """Update a single document that matches `query_conditions`.
 
-        Performs a type check on inputs and only attempts update if a
-        matching document exists.
+        Performs a type check on inputs; a missing document is reported
+        from the update result instead of a separate find_one round trip.
         """
         if not isinstance(query_conditions, dict) or not isinstance(after_change, dict):
             raise TypeError("query_conditions and after_change must be of dict type")
-        res = self.query_one_data(query_conditions, collection)
-        if res is not None:
-            try:
-                # Use $set to update fields on the matched document
-                self.use_collection(collection).update_one(query_conditions, {"$set": after_change})
-            except Exception as e:
-                logs.error(e)
-                return None
-        else:
-            logs.info("No matching data found to update.")
+        try:
+            # Use $set to update fields on the matched document
+            result = self.use_collection(collection).update_one(query_conditions, {"$set": after_change})
+        except Exception as e:
+            logs.error(e)
             return None
+        if result.matched_count == 0:
+            logs.info("No matching data found to update.")
+        return None
 
     def delete_collection(self, search, collection):
         """Delete a single document matching `search`."""
@@ -351,32 +904,114 @@ class MongoConnection:
         except Exception:
             return None
 
+_ssh_clients = {}
+_ssh_host_locks = {}
+_ssh_lock = threading.Lock()
+
+
+def get_ssh_client(conn_info):
+    """Connected paramiko client for a host, reused while its transport stays active."""
+    key = (conn_info['hostname'], conn_info['port'], conn_info['username'])
+    with _ssh_lock:
+        host_lock = _ssh_host_locks.setdefault(key, threading.Lock())
+    # One lock per host so parallel fan-out connects to different hosts concurrently
+    with host_lock:
+        client = _ssh_clients.get(key)
+        transport = client.get_transport() if client is not None else None
+        if transport is None or not transport.is_active():
+            if client is not None:
+                client.close()
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            # Establish SSH connection; will raise on failure
+            client.connect(**conn_info)
+            _ssh_clients[key] = client
+            logs.info(f"Connected to SSH host {conn_info['hostname']} successfully.")
+    return client
+
+
+def close_ssh_clients():
+    """Close every cached SSH connection (session end)."""
+    with _ssh_lock:
+        clients = list(_ssh_clients.values())
+        _ssh_clients.clear()
+    for client in clients:
+        client.close()
+
+
 class SSHConnection:
-    """Simple SSH helper using paramiko to execute remote commands."""
-    def __init__(self):
-        """Create an SSH client and connect using configuration."""
+    """SSH helper using paramiko to execute remote commands.
+
+    Connections are cached per host and reused by every instance; paramiko
+    multiplexes concurrent commands over one transport as separate channels.
+    """
+    def __init__(self, host=None, port=None, username=None, password=None, timeout=None):
+        """Connect (or reuse the connection) to a host; arguments default to configuration."""
         self.__conn_info = {
-            'hostname': conf.get_section_ssh('host'),
-            'port': int(conf.get_section_ssh('port')),
-            'username': conf.get_section_ssh('username'),
-            'password': conf.get_section_ssh('password'),
-            'timeout': int(conf.get_section_ssh('timeout')),
+            'hostname': host or conf.get_section_ssh('host'),
+            'port': int(port or conf.get_section_ssh('port')),
+            'username': username or conf.get_section_ssh('username'),
+            'password': password or conf.get_section_ssh('password'),
+            'timeout': int(timeout or conf.get_section_ssh('timeout')),
         }
+        self.host = self.__conn_info['hostname']
+        get_ssh_client(self.__conn_info)
 
-        self.__client = paramiko.SSHClient()
-        self.__client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        # Establish SSH connection; will raise on failure
-        self.__client.connect(**self.__conn_info)
-
-        if self.__client:
-            logs.info("Connected to SSH successfully.")
+    @property
+    def _client(self):
+        # Reconnects transparently if the cached transport dropped
+        return get_ssh_client(self.__conn_info)
 
     def get_ssh_content(self, command=None):
         """Execute `command` on the remote host and return stdout as text.
 
         If `command` is None the default command from configuration is used.
         """
-        stdin, stdout, stderr = self.__client.exec_command(
+        stdin, stdout, stderr = self._client.exec_command(
             command if command is not None else conf.get_section_ssh('command'))
         content = stdout.read().decode()
         return content
+
+    def stream_lines(self, command=None):
+        """Yield stdout of `command` line by line as the remote host produces it."""
+        stdin, stdout, stderr = self._client.exec_command(
+            command if command is not None else conf.get_section_ssh('command'))
+        try:
+            for line in stdout:
+                yield line.rstrip('\r\n')
+        finally:
+            stdout.channel.close()
+
+    @classmethod
+    def run_on_hosts(cls, hosts, command=None, max_workers=None):
+        """
+        Run one command on many hosts at once from a thread pool.
+        :param hosts: host names, or dicts of SSHConnection arguments per host
+        :param max_workers: parallel hosts, defaults to setting.SSH_MAX_WORKERS
+        :return: dict host -> stdout text, or the exception raised for that host
+        """
+        targets = [host if isinstance(host, dict) else {'host': host} for host in hosts]
+        if not targets:
+            return {}
+
+        def run(target):
+            try:
+                return cls(**target).get_ssh_content(command)
+            except Exception as e:
+                logs.error(f"SSH command on {target.get('host')} failed: {e}")
+                return e
+
+        workers = min(len(targets), max_workers or setting.SSH_MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ssh') as executor:
+            outputs = executor.map(run, targets)
+            return {target.get('host') or conf.get_section_ssh('host'): output
+                    for target, output in zip(targets, outputs)}
+
+
+def close_connections():
+    """Release every pooled database, cache and SSH connection; called once at session end."""
+    close_mysql_pool()
+    close_clickhouse_engines()
+    close_redis_pools()
+    close_mongo_clients()
+    close_ssh_clients()
@@ -0,0 +1,217 @@
+"""Declarative MySQL test-data seeding.
+
+Datasets are read from YAML, CSV or XML files and bulk-inserted with
+executemany (pymysql rewrites it into multi-row INSERTs) inside a single
+transaction. Cleanup either deletes the seeded rows in batches by their key
+columns, or rolls the whole seeding transaction back.
+
+YAML (a list of datasets; `csv` may replace `rows`):
+
+    - table: sys_user
+      key: [login_name]
+      rows:
+        - { login_name: test999, user_name: Test }
+
+CSV: the file name is the table, the header row holds the columns and
+empty cells are NULL. XML (e.g. under FILE_PATH['XML']):
+
+    <datasets>
+      <dataset table="sys_user" key="login_name">
+        <row login_name="test999" user_name="Test"/>
+      </dataset>
+    </datasets>
+"""
+
+import csv
+import os
+import xml.etree.ElementTree as et
+
+import yaml
+
+from common.connection import get_mysql_pool
+from common.record_log import logs
+from conf import setting
+
+
+class Dataset:
+    """Rows for one table; `key` columns (default: all, declare them when values may be NULL)
+    identify the rows for cleanup."""
+
+    def __init__(self, table, columns, rows, key=None, source=None, data_file=None):
+        self.table = table
+        self.columns = list(columns)
+        self.rows = [tuple(row) for row in rows]
+        self.key = list(key) if key else list(self.columns)
+        self.source = source
+        self.data_file = data_file or source
+        missing = [column for column in self.key if column not in self.columns]
+        if missing:
+            raise ValueError(f'{source}: key columns {missing} are not columns of table {table}')
+
+    @classmethod
+    def from_dicts(cls, table, rows, key=None, source=None):
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        return cls(table, columns, [[row.get(column) for column in columns] for row in rows], key, source)
+
+    def key_values(self):
+        """Distinct key tuples of the seeded rows, in insertion order."""
+        positions = [self.columns.index(column) for column in self.key]
+        return list(dict.fromkeys(tuple(row[i] for i in positions) for row in self.rows))
+
+    def __repr__(self):
+        return f'Dataset({self.table}, {len(self.rows)} rows)'
+
+
+def _quote(name):
+    return '`%s`' % name.replace('`', '``')
+
+
+def _split_key(key):
+    if isinstance(key, str):
+        return [column.strip() for column in key.split(',') if column.strip()]
+    return key
+
+
+def read_csv_rows(path):
+    """(columns, rows) of a CSV file with a header row; empty cells become NULL."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        rows = [[value if value != '' else None for value in row] for row in reader]
+    return columns, rows
+
+
+def load_yaml(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or []
+    datasets = []
+    for item in data if isinstance(data, list) else [data]:
+        table, key = item.get('table'), _split_key(item.get('key'))
+        if not table:
+            raise ValueError(f'{path}: every dataset needs a "table"')
+        if item.get('csv'):
+            csv_path = os.path.join(os.path.dirname(path), item['csv'])
+            columns, rows = read_csv_rows(csv_path)
+            datasets.append(Dataset(table, columns, rows, key, path, csv_path))
+        else:
+            datasets.append(Dataset.from_dicts(table, item.get('rows') or [], key, path))
+    return datasets
+
+
+def load_csv(path):
+    columns, rows = read_csv_rows(path)
+    table = os.path.splitext(os.path.basename(path))[0]
+    return [Dataset(table, columns, rows, source=path)]
+
+
+def load_xml(path):
+    root = et.parse(path).getroot()
+    elements = [root] if root.tag == 'dataset' else root.findall('dataset')
+    return [Dataset.from_dicts(element.get('table'), [dict(row.attrib) for row in element.findall('row')],
+                               _split_key(element.get('key')), path)
+            for element in elements]
+
+
+LOADERS = {'.yaml': load_yaml, '.yml': load_yaml, '.csv': load_csv, '.xml': load_xml}
+
+
+def load_datasets(*paths):
+    """Datasets of every file given; a directory contributes its supported files in name order."""
+    datasets = []
+    for path in paths:
+        if not os.path.isabs(path):
+            path = os.path.join(setting.ROOT_DIR, path)
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+        for file in files:
+            loader = LOADERS.get(os.path.splitext(file)[1].lower())
+            if loader is not None:
+                datasets.extend(loader(file))
+    # A CSV referenced from a YAML dataset is not seeded again on its own
+    referenced = {os.path.abspath(d.data_file) for d in datasets if d.data_file != d.source}
+    return [d for d in datasets if d.data_file != d.source or os.path.abspath(d.source) not in referenced]
+
+
+class DataSeeder:
+    """
+    Seed datasets in one transaction and undo them later.
+
+    cleanup='delete' commits the rows (so the system under test sees them)
+    and removes them with batched DELETE ... WHERE key IN (...).
+    cleanup='rollback' keeps the seeding transaction open on its own pooled
+    connection (`seeder.connection`) until cleanup() rolls it back: the rows
+    are only visible through that connection, never to the application
+    under test or to other pooled queries.
+    """
+
+    def __init__(self, datasets, cleanup='delete', batch_size=1000, pool=None):
+        if cleanup not in ('delete', 'rollback'):
+            raise ValueError(f'cleanup must be "delete" or "rollback", got {cleanup!r}')
+        self.datasets = datasets
+        self.cleanup_mode = cleanup
+        self.batch_size = batch_size
+        self.pool = pool or get_mysql_pool()
+        # Connection holding the open seeding transaction (rollback mode)
+        self.connection = None
+
+    def _batches(self, items):
+        for start in range(0, len(items), self.batch_size):
+            yield items[start:start + self.batch_size]
+
+    def _insert(self, conn):
+        with conn.cursor() as cursor:
+            for dataset in self.datasets:
+                if not dataset.rows:
+                    continue
+                sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+                    _quote(dataset.table), ', '.join(map(_quote, dataset.columns)),
+                    ', '.join(['%s'] * len(dataset.columns)))
+                for batch in self._batches(dataset.rows):
+                    cursor.executemany(sql, batch)
+                logs.info(f'Seeded {len(dataset.rows)} rows into {dataset.table}')
+
+    def _rollback(self, conn):
+        broken = True
+        try:
+            conn.rollback()
+            broken = False
+        finally:
+            self.pool.release(conn, discard=broken)
+
+    def seed(self):
+        """Insert every dataset; all or nothing."""
+        if self.cleanup_mode == 'delete':
+            with self.pool.transaction() as conn:
+                self._insert(conn)
+            return
+
+        # Explicit checkout, never bound to the context: tests and their
+        # isolation() scopes keep using connections of their own
+        conn = self.pool.acquire()
+        try:
+            conn.begin()
+            self._insert(conn)
+        except BaseException:
+            self._rollback(conn)
+            raise
+        self.connection = conn
+
+    def cleanup(self):
+        """Remove the seeded rows: roll back, or delete them in reverse dataset order."""
+        if self.connection is not None:
+            conn, self.connection = self.connection, None
+            self._rollback(conn)
+            logs.info(f'Rolled back seeding of {len(self.datasets)} datasets')
+            return
+
+        with self.pool.transaction() as conn, conn.cursor() as cursor:
+            for dataset in reversed(self.datasets):
+                keys = dataset.key_values()
+                if not keys:
+                    continue
+                columns = ', '.join(map(_quote, dataset.key))
+                placeholder = '(%s)' % ', '.join(['%s'] * len(dataset.key))
+                for batch in self._batches(keys):
+                    sql = 'DELETE FROM %s WHERE (%s) IN (%s)' % (
+                        _quote(dataset.table), columns, ', '.join([placeholder] * len(batch)))
+                    cursor.execute(sql, [value for key in batch for value in key])
+                logs.info(f'Removed {len(keys)} seeded keys from {dataset.table}')
@@ -8,16 +8,16 @@ import re
 import time
 from hashlib import sha1
 from conf.setting import ROOT_DIR
-from pandas.tseries.offsets import Day
-from common.operator_csv import OperatorCsv
 from common.operator_yaml import OperatorYaml
 import csv
 
 
 class DebugTalk:
 
-    def __init__(self):
-        self.read = OperatorYaml()  # Initialize YAML reader
+    @property
+    def read(self):
+        """Extract data reader, built per lookup so a shared instance sees fresh data"""
+        return OperatorYaml()
 
     def get_extract_data(self, node_name, randoms=None) -> str:
         """
@@ -26,8 +26,10 @@ class DebugTalk:
         :param randoms: int to control return
         :return: data string or list
         """
-        data = self.read.get_data()
+        read = self.read
         if randoms is not None and bool(re.compile(r'^[-+]?[0-9]*\.?[0-9]+([eE][-+]?[0-9]+)?$').match(randoms)):
+            # Only the random/index selectors need the whole data, a plain lookup reads one key
+            data = read.get_data()
             randoms = int(randoms)
             data_value = {
                 randoms: self.get_extract_order_data(data, randoms),
@@ -37,7 +39,7 @@ class DebugTalk:
             }
             data = data_value[randoms]
         else:
-            data = self.read.get_extract_yaml(node_name, randoms)
+            data = read.get_extract_yaml(node_name, randoms)
         return data
 
     @staticmethod
@@ -84,7 +86,7 @@ class DebugTalk:
     def start_time():
         """Yesterday standard time"""
         now_time = datetime.datetime.now()
-        day_before_time = (now_time - 1 * Day()).strftime("%Y-%m-%d %H:%M:%S")
+        day_before_time = (now_time - datetime.timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
         return day_before_time
 
     @staticmethod
@@ -97,14 +99,14 @@ class DebugTalk:
     def start_forward_time():
         """15 days before today, date only"""
         now_time = datetime.datetime.now()
-        day_before_time = (now_time - 15 * Day()).strftime("%Y-%m-%d")
+        day_before_time = (now_time - datetime.timedelta(days=15)).strftime("%Y-%m-%d")
         return day_before_time
 
     @staticmethod
     def start_after_time():
         """7 days after today, date only"""
         now_time = datetime.datetime.now()
-        day_after_time = (now_time + 7 * Day()).strftime("%Y-%m-%d")
+        day_after_time = (now_time + datetime.timedelta(days=7)).strftime("%Y-%m-%d")
         return day_after_time
 
     @staticmethod
@@ -186,6 +188,8 @@ class DebugTalk:
     @staticmethod
     def vehicle_random():
         """Random vehicle number from CSV"""
+        # OperatorCsv needs pandas, import it only when this function is used
+        from common.operator_csv import OperatorCsv
         data = OperatorCsv(os.path.join(ROOT_DIR, 'data', 'vehicleNo.csv')).get_each_column_by_name('vno')
         vel_num = random.choice(data)
         return vel_num
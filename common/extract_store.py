@@ -0,0 +1,241 @@
+"""Stores for extracted variables (extract.yaml).
+
+ExtractStore (EXTRACT_BACKEND = 'yaml'): keys are merged into an in-memory
+dict and each update is appended to a journal next to extract.yaml (one JSON
+object per line). The journal is replayed if a previous run stopped before
+compaction, and `compact()` folds everything back into extract.yaml once, at
+session end.
+
+SqliteExtractStore (EXTRACT_BACKEND = 'sqlite'): keys live in a local SQLite
+database in WAL mode so several processes (pytest-xdist workers) can share it
+safely. Every key belongs to a namespace: one per xdist worker by default, or
+a fixed shared one, and `use_namespace()` switches it for a scenario.
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import yaml
+
+from common.record_log import logs
+from conf import setting
+from conf.setting import FILE_PATH
+
+JOURNAL_SUFFIX = '.journal'
+
+
+class ExtractStore:
+    def __init__(self, file_path=None):
+        self.file_path = file_path or FILE_PATH['EXTRACT']
+        self.journal_path = self.file_path + JOURNAL_SUFFIX
+        self._lock = threading.RLock()
+        self._journal = None
+        self._data = self._load()
+
+    def _load(self):
+        """Read extract.yaml and replay any journal left by an interrupted run."""
+        data = {}
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as file:
+                loaded = yaml.safe_load(file)
+            if isinstance(loaded, dict):
+                data.update(loaded)
+            elif loaded is not None:
+                logs.error(f'Extract file {self.file_path} is not a mapping, ignored')
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logs.error(f'Error loading extract file {self.file_path}: {e}')
+
+        if os.path.exists(self.journal_path):
+            replayed = 0
+            with open(self.journal_path, 'r', encoding='utf-8') as journal:
+                for line in journal:
+                    try:
+                        data.update(json.loads(line))
+                        replayed += 1
+                    except ValueError:
+                        # A torn last line from a crash, everything before it is valid
+                        logs.error(f'Skipping corrupt journal entry in {self.journal_path}')
+            logs.info(f'Replayed {replayed} journal entries from {self.journal_path}')
+        return data
+
+    def get_data(self):
+        """Current extract data (shared dict, treat as read-only)."""
+        return self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def update(self, mapping):
+        """Merge keys in memory and append them to the journal."""
+        line = json.dumps(mapping, ensure_ascii=False, default=str)
+        with self._lock:
+            self._data.update(mapping)
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal.write(line + '\n')
+            self._journal.flush()
+
+    def clear(self):
+        """Drop all keys and empty both extract.yaml and the journal."""
+        with self._lock:
+            self._data.clear()
+            self._close_journal()
+            with open(self.file_path, 'w', encoding='utf-8') as file:
+                file.truncate()
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+
+    def compact(self):
+        """Write the merged data to extract.yaml and drop the journal."""
+        with self._lock:
+            if self._journal is None and not os.path.exists(self.journal_path):
+                return
+            tmp = self.file_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as file:
+                yaml.safe_dump(self._data, file, allow_unicode=True, sort_keys=False)
+            os.replace(tmp, self.file_path)
+            self._close_journal()
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            logs.debug(f'Extract data compacted into {self.file_path}')
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class SqliteExtractStore:
+    """Namespaced key/value table in a WAL-mode SQLite database."""
+
+    def __init__(self, db_path=None, namespace=None):
+        self.db_path = db_path or FILE_PATH['EXTRACT_DB']
+        self.namespace = namespace or default_namespace()
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS extract ('
+                'namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT, updated REAL, '
+                'PRIMARY KEY (namespace, key)) WITHOUT ROWID')
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads, keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @property
+    def current_namespace(self):
+        return _scenario_namespace.get() or self.namespace
+
+    def get_data(self):
+        """Snapshot of every key in the current namespace."""
+        rows = self._connection().execute(
+            'SELECT key, value FROM extract WHERE namespace = ?', (self.current_namespace,))
+        return {key: json.loads(value) for key, value in rows}
+
+    def __getitem__(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM extract WHERE namespace = ? AND key = ?', (self.current_namespace, key)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, mapping):
+        """Atomically upsert every key of mapping in one transaction."""
+        namespace, now = self.current_namespace, time.time()
+        rows = [(namespace, key, json.dumps(value, ensure_ascii=False, default=str), now)
+                for key, value in mapping.items()]
+        with self._connection() as conn:
+            conn.executemany(
+                'INSERT INTO extract (namespace, key, value, updated) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, updated = excluded.updated',
+                rows)
+
+    def clear(self):
+        """Drop the keys of the current namespace only."""
+        with self._connection() as conn:
+            conn.execute('DELETE FROM extract WHERE namespace = ?', (self.current_namespace,))
+
+    def compact(self):
+        """Data is already durable; fold the WAL back into the database file."""
+        self._connection().execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+
+_scenario_namespace = contextvars.ContextVar('extract_namespace', default=None)
+
+
+def default_namespace():
+    """Namespace of this process: the xdist worker id or a fixed shared name."""
+    if setting.EXTRACT_NAMESPACE == 'worker':
+        return os.environ.get('PYTEST_XDIST_WORKER', 'main')
+    return setting.EXTRACT_NAMESPACE
+
+
+def shared_across_workers():
+    """True when xdist workers read and write the same keys (extract.yaml or a fixed SQLite namespace)."""
+    return setting.EXTRACT_BACKEND != 'sqlite' or setting.EXTRACT_NAMESPACE != 'worker'
+
+
+@contextlib.contextmanager
+def use_namespace(namespace):
+    """Route SQLite extract reads/writes to another namespace, e.g. per scenario."""
+    token = _scenario_namespace.set(namespace)
+    try:
+        yield
+    finally:
+        _scenario_namespace.reset(token)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_extract_store(file_path=None):
+    """Return the process-wide store for an extract file, honouring EXTRACT_BACKEND."""
+    key = os.path.abspath(file_path or FILE_PATH['EXTRACT'])
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                if setting.EXTRACT_BACKEND == 'sqlite':
+                    store = SqliteExtractStore()
+                else:
+                    store = ExtractStore(key)
+                _stores[key] = store
+    return store
+
+
+def compact_all():
+    """Compact every open store; called at session end and interpreter exit."""
+    for store in list(_stores.values()):
+        try:
+            store.compact()
+        except Exception as e:
+            logs.error(f'Error compacting extract store: {e}')
+
+
+atexit.register(compact_all)
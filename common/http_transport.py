@@ -0,0 +1,138 @@
+"""Process-wide pooled HTTP transport.
+
+A single ``requests.Session`` is shared by every ``SendRequest`` so TCP
+connections and TLS sessions are kept alive between test cases instead of
+being re-established for each request. Connections are pooled per host
+by urllib3; pool sizing and keep-alive behaviour come from
+``setting.HTTP_POOL``.
+"""
+
+import socket
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from conf import setting
+from common.record_log import logs
+
+
+class _NoPersistCookiePolicy(DefaultCookiePolicy):
+    """Never store server cookies in the shared session jar.
+
+    Each request used to run in its own session, so cookies returned by one
+    case did not leak into the next. Cookies are still available on the
+    response object itself (``response.cookies``).
+    """
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter that keeps connection counters of evicted host pools."""
+
+    def __init__(self, socket_options=None, **kwargs):
+        self._socket_options = socket_options
+        self.retired_connections = 0
+        self.retired_requests = 0
+        self._counter_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self._socket_options is not None:
+            pool_kwargs['socket_options'] = self._socket_options
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        # Pools evicted from the LRU container are closed and their counters kept
+        self.poolmanager.pools.dispose_func = self._retire_pool
+
+    def _retire_pool(self, pool):
+        with self._counter_lock:
+            self.retired_connections += pool.num_connections
+            self.retired_requests += pool.num_requests
+        pool.close()
+
+    def counters(self):
+        """Return (connections_opened, requests_sent) for this adapter."""
+        pools = self.poolmanager.pools
+        with pools.lock:
+            live = [pools[key] for key in pools.keys()]
+        with self._counter_lock:
+            opened = self.retired_connections + sum(p.num_connections for p in live)
+            sent = self.retired_requests + sum(p.num_requests for p in live)
+        return opened, sent
+
+
+class HttpTransport:
+    """Shared session with per-host connection pools and reuse counters."""
+
+    def __init__(self, pool_conf=None):
+        pool_conf = dict(setting.HTTP_POOL if pool_conf is None else pool_conf)
+
+        socket_options = None
+        if pool_conf.get('tcp_keepalive'):
+            socket_options = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+
+        self.adapter = PooledAdapter(
+            socket_options=socket_options,
+            pool_connections=pool_conf.get('pool_connections', 10),
+            pool_maxsize=pool_conf.get('pool_maxsize', 10),
+            pool_block=pool_conf.get('pool_block', False),
+            max_retries=pool_conf.get('max_retries', 0)
+        )
+
+        self.session = requests.Session()
+        self.session.cookies.set_policy(_NoPersistCookiePolicy())
+        if not pool_conf.get('keep_alive', True):
+            self.session.headers['Connection'] = 'close'
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        logs.debug(f'HTTP transport created with pool settings {pool_conf}')
+
+    def request(self, **kwargs):
+        """Send a request through the shared session."""
+        return self.session.request(**kwargs)
+
+    def stats(self):
+        """Connection reuse statistics since the transport was created."""
+        opened, sent = self.adapter.counters()
+        return {
+            'requests': sent,
+            'new_connections': opened,
+            'reused_connections': max(sent - opened, 0),
+        }
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide transport, creating it on first use."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+    return _transport
+
+
+def close_transport():
+    """Log reuse statistics and shut the shared transport down."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            return
+        stats = _transport.stats()
+        logs.info('HTTP transport: %(requests)s requests, %(new_connections)s new connections, '
+                  '%(reused_connections)s reused connections' % stats)
+        _transport.close()
+        _transport = None
@@ -0,0 +1,405 @@
+"""Compiled JSONPath evaluation.
+
+Expressions are parsed once into a list of steps (cached by expression) and
+evaluated by walking the document directly, instead of jsonpath 0.82's
+re-parse and eval() on every call. The supported subset covers what our YAML
+uses:
+
+    $.a.b   $['a']   $.list[0]   $.list[-1]   $.list[0:2]   $.list[0,2]
+    $.list[*]   $.*   $..key   $..[*]   $.list[?(@.status == 'ok')]
+
+Filters compare one `@.path` with a literal (==, !=, <, <=, >, >=), test that
+`@.path` is truthy, and may be combined with && / ||. Results are a list of
+matches in jsonpath 0.82 order; `jsonpath()` keeps its False-when-empty
+return value. One deliberate extension: negative indexes such as
+`$.list[-1]` select from the end, where jsonpath 0.82 finds nothing.
+
+`MultiPath` evaluates all paths of a test case (validation and extraction)
+in a single traversal of the response document.
+"""
+
+import functools
+import json
+import operator
+import re
+
+PATH_CACHE_SIZE = 1024
+
+_COMPARATORS = {
+    '==': operator.eq, '!=': operator.ne,
+    '<=': operator.le, '>=': operator.ge,
+    '<': operator.lt, '>': operator.gt,
+}
+_COMPARISON_PATTERN = re.compile(r'^(@(?:\.[\w-]+|\[[^\]]+\])*)\s*(==|!=|<=|>=|<|>)\s*(.+)$')
+_MEMBER_PATTERN = re.compile(r'^@((?:\.[\w-]+|\[[^\]]+\])*)$')
+
+
+class JsonPathError(ValueError):
+    """Raised for expressions outside the supported JSONPath subset."""
+
+
+def _children(node):
+    if isinstance(node, dict):
+        return list(node.values())
+    if isinstance(node, list):
+        return node
+    return []
+
+
+class _Key:
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def select(self, node):
+        if isinstance(node, dict):
+            if self.name in node:
+                return [node[self.name]]
+        elif isinstance(node, list) and re.fullmatch(r'-?\d+', self.name):
+            index = int(self.name)
+            if -len(node) <= index < len(node):
+                return [node[index]]
+        return []
+
+
+class _Index:
+    __slots__ = ('index',)
+
+    def __init__(self, index):
+        self.index = index
+
+    def select(self, node):
+        if isinstance(node, list) and -len(node) <= self.index < len(node):
+            return [node[self.index]]
+        if isinstance(node, dict) and str(self.index) in node:
+            return [node[str(self.index)]]
+        return []
+
+
+class _Wildcard:
+    __slots__ = ()
+
+    def select(self, node):
+        return _children(node)
+
+
+class _Slice:
+    __slots__ = ('slice',)
+
+    def __init__(self, start, stop, step):
+        self.slice = slice(start, stop, step)
+
+    def select(self, node):
+        return node[self.slice] if isinstance(node, list) else []
+
+
+class _Union:
+    __slots__ = ('steps',)
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def select(self, node):
+        return [match for step in self.steps for match in step.select(node)]
+
+
+class _Filter:
+    __slots__ = ('predicate',)
+
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def select(self, node):
+        return [child for child in _children(node) if self.predicate(child)]
+
+
+class _Descendant:
+    """`..step`: apply step here, then keep searching in every child."""
+    __slots__ = ('step',)
+
+    def __init__(self, step):
+        self.step = step
+
+    def select(self, node):
+        return self.step.select(node)
+
+
+def _literal(text):
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '\'"':
+        return text[1:-1]
+    lowered = text.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    if lowered in ('null', 'none'):
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        raise JsonPathError(f'Unsupported filter literal: {text}') from None
+
+
+def _member_getter(member_path):
+    steps = _parse_steps(member_path) if member_path else []
+
+    def get(item):
+        nodes = [item]
+        for step in steps:
+            nodes = [match for node in nodes for match in step.select(node)]
+            if not nodes:
+                raise LookupError
+        return nodes[0]
+
+    return get
+
+
+def _compile_filter(expr):
+    """
+    Compile a filter body (without ?( )) into a predicate. Like jsonpath 0.82,
+    which evaluates the whole filter at once, a missing member or an invalid
+    comparison reached anywhere in it rejects the item.
+    """
+    condition = _compile_condition(expr)
+
+    def predicate(item):
+        try:
+            return bool(condition(item))
+        except (LookupError, TypeError):
+            return False
+
+    return predicate
+
+
+def _compile_condition(expr):
+    expr = expr.strip()
+    if '||' in expr:
+        parts = [_compile_condition(part) for part in expr.split('||')]
+        return lambda item: any(part(item) for part in parts)
+    if '&&' in expr:
+        parts = [_compile_condition(part) for part in expr.split('&&')]
+        return lambda item: all(part(item) for part in parts)
+
+    match = _COMPARISON_PATTERN.match(expr)
+    if match:
+        get = _member_getter(match.group(1)[1:])
+        compare = _COMPARATORS[match.group(2)]
+        expected = _literal(match.group(3))
+        return lambda item: compare(get(item), expected)
+
+    match = _MEMBER_PATTERN.match(expr)
+    if match:
+        # Truthiness, not presence: None, 0, '' and empty containers do not match
+        get = _member_getter(match.group(1))
+        return lambda item: bool(get(item))
+
+    raise JsonPathError(f'Unsupported filter expression: {expr}')
+
+
+def _split_top_level(text, sep):
+    """Split on sep outside quotes."""
+    parts, current, quote = [], [], None
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char == sep:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+
+def _parse_bracket(content):
+    content = content.strip()
+    if content == '*':
+        return _Wildcard()
+    if content.startswith('?(') and content.endswith(')'):
+        return _Filter(_compile_filter(content[2:-1]))
+
+    items = _split_top_level(content, ',')
+    if len(items) > 1:
+        return _Union([_parse_bracket(item) for item in items])
+
+    if len(content) >= 2 and content[0] == content[-1] and content[0] in '\'"':
+        return _Key(content[1:-1])
+    if ':' in content:
+        bounds = content.split(':')
+        if len(bounds) > 3:
+            raise JsonPathError(f'Invalid slice: [{content}]')
+        try:
+            values = [int(b) if b.strip() else None for b in bounds] + [None] * (3 - len(bounds))
+        except ValueError:
+            raise JsonPathError(f'Invalid slice: [{content}]') from None
+        return _Slice(*values)
+    if re.fullmatch(r'-?\d+', content):
+        return _Index(int(content))
+    if content:
+        return _Key(content)
+    raise JsonPathError('Empty brackets in path')
+
+
+def _find_bracket_end(expr, start):
+    """Index of the ']' closing the '[' at start, skipping quotes and parentheses."""
+    depth, quote = 0, None
+    for pos in range(start + 1, len(expr)):
+        char = expr[pos]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ']' and depth == 0:
+            return pos
+    raise JsonPathError(f'Unclosed bracket in path: {expr}')
+
+
+def _parse_steps(expr):
+    steps, pos, descendant = [], 0, False
+    while pos < len(expr):
+        if expr.startswith('..', pos):
+            descendant, pos = True, pos + 2
+            if pos < len(expr) and expr[pos] not in '[':
+                # `..name` / `..*`: the name follows without a dot
+                expr = expr[:pos] + '.' + expr[pos:]
+            continue
+        char = expr[pos]
+        if char == '.':
+            end = pos + 1
+            while end < len(expr) and expr[end] not in '.[':
+                end += 1
+            name = expr[pos + 1:end]
+            if not name:
+                raise JsonPathError(f'Empty member name in path: {expr}')
+            step = _Wildcard() if name == '*' else _Key(name)
+            pos = end
+        elif char == '[':
+            end = _find_bracket_end(expr, pos)
+            step = _parse_bracket(expr[pos + 1:end])
+            pos = end + 1
+        else:
+            raise JsonPathError(f'Unexpected "{char}" at position {pos} in path: {expr}')
+        steps.append(_Descendant(step) if descendant else step)
+        descendant = False
+    if descendant:
+        raise JsonPathError(f'Path cannot end with "..": {expr}')
+    return steps
+
+
+class JsonPath:
+    """A compiled JSONPath expression; reuse it for any number of documents."""
+
+    def __init__(self, expr):
+        self.expr = expr
+        body = expr.strip()
+        if body.startswith('$'):
+            body = body[1:]
+        elif body and body[0] not in '.[':
+            body = '.' + body
+        self.steps = _parse_steps(body)
+
+    def find(self, document):
+        """All matches in jsonpath 0.82 order (empty list when nothing matches)."""
+        matches = []
+        self._walk(document, 0, matches)
+        return matches
+
+    def _walk(self, node, index, matches):
+        if index == len(self.steps):
+            matches.append(node)
+            return
+        step = self.steps[index]
+        for child in step.select(node):
+            self._walk(child, index + 1, matches)
+        if isinstance(step, _Descendant):
+            for child in _children(node):
+                self._walk(child, index, matches)
+
+    def __repr__(self):
+        return f'JsonPath({self.expr!r})'
+
+
+class MultiPath:
+    """
+    Several compiled paths evaluated against one document.
+    Whole-tree searches of the form `$..key` (what `contains` assertions
+    build) share a single preorder scan of the document; every other path
+    only walks the nodes its steps select. Results are identical to
+    evaluating each expression with JsonPath.find.
+    """
+
+    def __init__(self, exprs):
+        self.exprs = list(dict.fromkeys(exprs))
+        self.scan_keys = {}
+        self.direct = []
+        for expr in self.exprs:
+            path = compile_path(expr)
+            steps = path.steps
+            if len(steps) == 1 and isinstance(steps[0], _Descendant) and isinstance(steps[0].step, _Key):
+                self.scan_keys.setdefault(steps[0].step.name, []).append(expr)
+            else:
+                self.direct.append(path)
+
+    def evaluate(self, document):
+        """
+        :return: dict expression -> list of matches (empty list when none)
+        """
+        results = {}
+        if self.scan_keys:
+            found = self._scan(document)
+            for key, exprs in self.scan_keys.items():
+                for expr in exprs:
+                    results[expr] = list(found[key])
+        for path in self.direct:
+            results[path.expr] = path.find(document)
+        return results
+
+    def _scan(self, document):
+        """One preorder walk collecting the values of every scanned key."""
+        keys = self.scan_keys
+        found = {key: [] for key in keys}
+        stack = [document]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                if len(keys) <= len(node):
+                    for key in keys:
+                        if key in node:
+                            found[key].append(node[key])
+                else:
+                    for key, value in node.items():
+                        if key in found:
+                            found[key].append(value)
+                children = node.values()
+            elif isinstance(node, list):
+                children = node
+            else:
+                continue
+            # Push in reverse so children are visited in document order
+            stack.extend(reversed([child for child in children if isinstance(child, (dict, list))]))
+        return found
+
+
+@functools.lru_cache(maxsize=PATH_CACHE_SIZE)
+def compile_paths(exprs):
+    """Cached MultiPath for a tuple of expressions."""
+    return MultiPath(exprs)
+
+
+@functools.lru_cache(maxsize=PATH_CACHE_SIZE)
+def compile_path(expr):
+    """Compile an expression once; later calls return the cached matcher."""
+    return JsonPath(expr)
+
+
+def jsonpath(document, expr):
+    """Drop-in for jsonpath.jsonpath: list of matches, or False if none."""
+    return compile_path(expr).find(document) or False
@@ -0,0 +1,263 @@
+"""Compressed log segments, retention and time-range search.
+
+When the active log file reaches setting.LOG_MAX_BYTES it is renamed to a
+timestamped segment (test.YYYYmmdd-HHMMSS.logs) and gzipped by a single
+background thread. While compressing, the first and last record time of the
+segment are recorded in segments.index (one JSON object per line), so a
+search for a time range only opens the segments that overlap it.
+
+Under pytest-xdist every worker writes and rotates its own file
+(test.gw0.YYYYmmdd.logs, segments test.gw0.YYYYmmdd-HHMMSS.logs), and
+leftover files are only recovered once no process can still be writing them.
+
+Retention deletes the oldest archived segments once they are older than
+setting.LOG_RETENTION_DAYS or together exceed setting.LOG_RETENTION_BYTES.
+
+Search from the command line:
+
+    python -m common.log_archive "ConnectionError" --since "2026-10-18 03:00" --level ERROR
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import glob
+import gzip
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from conf import setting
+
+INDEX_NAME = 'segments.index'
+# Record header written by record_log.LOG_FORMAT; the timestamp sorts as text
+RECORD_PATTERN = re.compile(r'^(DEBUG|INFO|WARNING|ERROR|CRITICAL) - (\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)')
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Active (not yet rotated) log file of the main process or an xdist worker: test[.gw0].YYYYmmdd.logs
+ACTIVE_PATTERN = re.compile(r'^test(\.[\w-]+)?\.(\d{8})\.logs$')
+
+_index_lock = threading.Lock()
+
+
+def _time_key(value):
+    """Normalize a datetime, timestamp or 'YYYY-mm-dd[ HH:MM[:SS]]' string to a sortable key."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        value = datetime.datetime.fromtimestamp(value)
+    return value.strftime(TIME_FORMAT)
+
+
+def segment_name(log_path, prefix='test'):
+    """Unused timestamped name for a closed segment."""
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    name = os.path.join(log_path, f'{prefix}.{stamp}.logs')
+    counter = 1
+    while os.path.exists(name) or os.path.exists(name + '.gz'):
+        name = os.path.join(log_path, f'{prefix}.{stamp}-{counter}.logs')
+        counter += 1
+    return name
+
+
+def read_index(log_path):
+    path = os.path.join(log_path, INDEX_NAME)
+    entries = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # A line cut short by a crash, the segment is still searched unindexed
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def _write_index(log_path, entries):
+    path = os.path.join(log_path, INDEX_NAME)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + '\n')
+    os.replace(tmp, path)
+
+
+def compress_segment(segment):
+    """Gzip a closed segment, index its time range and remove the plain file."""
+    log_path = os.path.dirname(segment)
+    target = segment + '.gz'
+    start = end = None
+    lines = 0
+    with open(segment, 'rb') as src, gzip.open(target + '.tmp', 'wb') as dst:
+        for line in src:
+            dst.write(line)
+            lines += 1
+            match = RECORD_PATTERN.match(line.decode('utf-8', 'replace'))
+            if match:
+                start = start or match.group(2)
+                end = match.group(2)
+    os.utime(target + '.tmp', (time.time(), os.path.getmtime(segment)))
+    os.replace(target + '.tmp', target)
+    os.remove(segment)
+    entry = {'file': os.path.basename(target), 'start': start, 'end': end,
+             'lines': lines, 'bytes': os.path.getsize(target)}
+    with _index_lock, open(os.path.join(log_path, INDEX_NAME), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+    return entry
+
+
+def apply_retention(log_path, max_age_days=None, max_bytes=None):
+    """Delete archived segments older than max_age_days, then the oldest ones beyond max_bytes."""
+    max_age_days = setting.LOG_RETENTION_DAYS if max_age_days is None else max_age_days
+    max_bytes = setting.LOG_RETENTION_BYTES if max_bytes is None else max_bytes
+    archived = sorted(glob.glob(os.path.join(glob.escape(log_path), '*.logs.gz')), key=os.path.getmtime)
+    before = time.time() - max_age_days * 86400 if max_age_days else None
+    total = sum(os.path.getsize(file) for file in archived)
+    removed = set()
+    for file in archived:
+        expired = before is not None and os.path.getmtime(file) < before
+        if not expired and not (max_bytes and total > max_bytes):
+            continue
+        try:
+            size = os.path.getsize(file)
+            os.remove(file)
+        except OSError:
+            continue
+        total -= size
+        removed.add(os.path.basename(file))
+    if removed:
+        with _index_lock:
+            _write_index(log_path, [e for e in read_index(log_path) if e.get('file') not in removed])
+    return removed
+
+
+class LogArchiver:
+    """Single background thread compressing segments and applying retention, in submission order."""
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='log-archiver')
+
+    def _run(self, func, *args):
+        try:
+            return self.executor.submit(func, *args)
+        except RuntimeError:
+            # Interpreter shutting down: finish the work in the caller
+            func(*args)
+
+    def _archive(self, segment):
+        try:
+            compress_segment(segment)
+            apply_retention(self.log_path)
+        except OSError as e:
+            sys.stderr.write(f'Log archiving of {segment} failed: {e}\n')
+
+    def archive(self, segment):
+        self._run(self._archive, segment)
+
+    @staticmethod
+    def in_use(path, active):
+        """Our own active file, or today's active file of another process (e.g. a sibling xdist worker)."""
+        if os.path.abspath(path) == os.path.abspath(active):
+            return True
+        match = ACTIVE_PATTERN.match(os.path.basename(path))
+        return match is not None and match.group(2) == time.strftime('%Y%m%d')
+
+    def _recover(self, active):
+        """Compress plain segments left behind (earlier days, crashed runs), then apply retention."""
+        for segment in sorted(glob.glob(os.path.join(glob.escape(self.log_path), '*.logs'))):
+            if not self.in_use(segment, active):
+                try:
+                    compress_segment(segment)
+                except OSError:
+                    # Still written by another process, try again next run
+                    continue
+        try:
+            apply_retention(self.log_path)
+        except OSError as e:
+            sys.stderr.write(f'Log retention failed: {e}\n')
+
+    def recover(self, active):
+        self._run(self._recover, active)
+
+
+def _segment_files(log_path, start, end):
+    """Segments that may hold records between start and end, oldest first."""
+    indexed = {}
+    for entry in read_index(log_path):
+        indexed[entry['file']] = entry
+    files = []
+    for path in glob.glob(os.path.join(glob.escape(log_path), '*.logs*')):
+        if not path.endswith(('.logs', '.logs.gz')):
+            continue
+        entry = indexed.get(os.path.basename(path))
+        if entry and entry.get('start'):
+            if (end and entry['start'] > end) or (start and entry['end'] < start):
+                continue
+            files.append((entry['start'], path))
+        else:
+            files.append((_time_key(os.path.getmtime(path)), path))
+    return [path for _, path in sorted(files)]
+
+
+def _records(path):
+    """Records of one segment; continuation lines (tracebacks) stay with their record."""
+    opener = gzip.open if path.endswith('.gz') else open
+    record = None
+    with opener(path, 'rt', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = RECORD_PATTERN.match(line)
+            if match:
+                if record:
+                    yield record
+                record = (match.group(1), match.group(2), [line])
+            elif record:
+                record[2].append(line)
+    if record:
+        yield record
+
+
+def grep(pattern, since=None, until=None, level=None, log_path=None):
+    """
+    Search plain and compressed segments.
+    :param pattern: regular expression searched in the whole record
+    :param since: datetime, timestamp or 'YYYY-mm-dd HH:MM:SS' (prefixes allowed), inclusive
+    :param until: same forms, inclusive
+    :param level: keep only records of this level name
+    :return: iterator of matching records as text
+    """
+    log_path = log_path or setting.FILE_PATH['LOG']
+    start, end = _time_key(since), _time_key(until)
+    # 'YYYY-mm-dd HH:MM' as an upper bound covers the whole minute
+    end_key = end + '\xff' if end else None
+    regex = re.compile(pattern)
+    for path in _segment_files(log_path, start, end_key):
+        for record_level, stamp, lines in _records(path):
+            if (start and stamp < start) or (end_key and stamp > end_key):
+                continue
+            if level and record_level != level.upper():
+                continue
+            text = ''.join(lines)
+            if regex.search(text):
+                yield text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Search log segments, including compressed ones.')
+    parser.add_argument('pattern')
+    parser.add_argument('--since')
+    parser.add_argument('--until')
+    parser.add_argument('--level')
+    parser.add_argument('--path', default=setting.FILE_PATH['LOG'])
+    args = parser.parse_args(argv)
+    for text in grep(args.pattern, args.since, args.until, args.level, args.path):
+        sys.stdout.write(text)
+
+
+if __name__ == '__main__':
+    main()
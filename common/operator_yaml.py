@@ -1,26 +1,60 @@
 import yaml
 import os
-from record_log import logs
+from common.record_log import logs
+from common.assertions import precompile_validation
+from common.extract_store import get_extract_store
+from common.case_cache import case_cache, SafeLoader
+from conf import setting
 from conf.setting import FILE_PATH
-from conf.operator_config import OperatorConfig
+
+
+def validate_testcase(base_info, test_case, file):
+    """Check the keys every YAML case needs and compile its validation, so broken files fail at collection"""
+    for key in ('api_name', 'url', 'method'):
+        if not isinstance(base_info, dict) or key not in base_info:
+            raise ValueError(f'{file}: baseInfo is missing "{key}"')
+    if not isinstance(test_case, dict) or 'case_name' not in test_case:
+        raise ValueError(f'{file}: testCase entry in "{base_info["api_name"]}" is missing "case_name"')
+    if 'validation' in test_case:
+        # Compiled plans are cached with the parsed case; bad rules fail collection here
+        try:
+            test_case['validation'] = precompile_validation(test_case['validation'])
+        except ValueError as e:
+            raise ValueError(f'{file}: invalid validation in "{test_case["case_name"]}": {e}') from None
+
+
+def build_testcase_list(data, file=None):
+    """Turn a parsed YAML test file into the list handed to pytest.mark.parametrize"""
+    if len(data) <= 1:
+        testcase_list = []
+        yam_data = data[0]
+        base_info = yam_data.get('baseInfo')
+        for ts in yam_data.get('testCase'):
+            validate_testcase(base_info, ts, file)
+            param = [base_info, ts]
+            testcase_list.append(param)
+        return testcase_list
+    else:
+        for yam_data in data:
+            for ts in yam_data.get('testCase'):
+                validate_testcase(yam_data.get('baseInfo'), ts, file)
+        return data
+
+
 def get_testcase_yaml(file):
-    testcase_list = []
     try:
+        if setting.CASE_CACHE:
+            return case_cache.load(file, lambda data: build_testcase_list(data, file))
         with open(file, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-            if len(data) <= 1:
-                yam_data = data[0]
-                base_info = yam_data.get('baseInfo')
-                for ts in yam_data.get('testCase'):
-                    param = [base_info, ts]
-                    testcase_list.append(param)
-                return testcase_list
-            else:
-                return data
+            return build_testcase_list(yaml.load(f, Loader=SafeLoader), file)
     except UnicodeDecodeError:
         logs.error(f"get_testcase_yaml: file 【{file}】 encoding error, please check if it is utf-8")
     except FileNotFoundError:
         logs.error(f'get_testcase_yaml: file 【{file}】 not found')
+    except ValueError as e:
+        # malformed cases must stop collection with their own message
+        logs.error(f'get_testcase_yaml: {e}')
+        raise
     except Exception as e:
         logs.error(f'get_testcase_yaml: unexpected error: {e}')
 
@@ -32,7 +66,14 @@ class OperatorYaml:
         else:
             self.__file_path = file_path
 
-        # 2. Load the YAML file
+        # 2. extract.yaml is served from the process-wide in-memory store
+        self.__store = None
+        self.__data = None
+        if os.path.abspath(self.__file_path) == os.path.abspath(FILE_PATH['EXTRACT']):
+            self.__store = get_extract_store(self.__file_path)
+            return
+
+        # 3. Load any other YAML file
         try:
             with open(self.__file_path, 'r', encoding='utf-8') as file:
                 self.__data = yaml.safe_load(file)
@@ -41,19 +82,23 @@ class OperatorYaml:
             logs.error(f"Error loading YAML file {self.__file_path}: {e}")
             self.__data = None
 
-        self.__conf = OperatorConfig()
+    @property
+    def _data(self):
+        if self.__store is not None:
+            return self.__store.get_data()
+        return self.__data
 
     def get_data(self):
         """Get the entire data from the YAML file"""
-        return self.__data
+        return self._data
 
     def get_value(self, key_path):
         """Get a value from the YAML data using a list of keys representing the path"""
-        if self.__data is None:
+        if self._data is None:
             logs.error(f"YAML file {self.__file_path} has not been loaded")
             return None
 
-        data = self.__data
+        data = self._data
         try:
             for key in key_path:
                 data = data[key]
@@ -63,35 +108,39 @@ class OperatorYaml:
             logs.error(f'Key path {key_path} not found in YAML data')
             return None
     def write_data(self, data):
-        """Write data to the YAML file"""
+        """Write data to the YAML file (extract.yaml keys are merged, not overwritten)"""
         if not isinstance(data, dict):
             logs.error(f"Data type {type(data)} not supported")
             return
         try:
-            with open(self.__file_path, 'w', encoding='utf-8') as file:
-                yaml.safe_dump(data, file, allow_unicode=True,sort_keys=False)
+            if self.__store is not None:
+                self.__store.update(data)
+            else:
+                with open(self.__file_path, 'w', encoding='utf-8') as file:
+                    yaml.safe_dump(data, file, allow_unicode=True,sort_keys=False)
             logs.debug(f"YAML file {self.__file_path} successfully written")
         except Exception as e:
             logs.error(f"Error writing to YAML file {self.__file_path}: {e}")
     def clear_data(self):
         """Clear all data in the YAML file"""
         try:
-            with open(self.__file_path, 'w', encoding='utf-8') as file:
-                file.truncate()
+            if self.__store is not None:
+                self.__store.clear()
+            else:
+                with open(self.__file_path, 'w', encoding='utf-8') as file:
+                    file.truncate()
             logs.debug(f"YAML file {self.__file_path} successfully cleared")
         except Exception as e:
             logs.error(f"Error clearing YAML file {self.__file_path}: {e}")
 
     def get_extract_yaml(self, node_name, second_node_name=None):
-        if os.path.exists(FILE_PATH['EXTRACT']):
-            pass
-        else:
-            logs.error(f'extract.yaml not found at {FILE_PATH["EXTRACT"]}')
+        # The store answers single-key lookups without materializing all data
+        source = self.__store if self.__store is not None else self._data
         try:
                 if second_node_name is None:
-                    return self.__data[node_name]
+                    return source[node_name]
                 else:
-                    return self.__data[node_name][second_node_name]
+                    return source[node_name][second_node_name]
         except Exception as e:
                 logs.error(f'Error retrieving data from extract.yaml: {e}')
                 return None
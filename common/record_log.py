@@ -1,6 +1,11 @@
+import atexit
+import collections
+import contextvars
 import datetime
+import queue
 import time
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from common.log_archive import LogArchiver, segment_name
 from conf import setting
 import logging
 import os
@@ -8,55 +13,187 @@ import os
 log_path = setting.FILE_PATH['LOG']
 if not os.path.exists(log_path):
     os.makedirs(log_path)
-logfile_name  = log_path + r'\test.{}.logs'.format(time.strftime('%Y%m%d'))
+# xdist workers write (and rotate) files of their own: test.gw0.YYYYmmdd.logs
+log_prefix = 'test.{}'.format(os.environ['PYTEST_XDIST_WORKER']) if os.environ.get('PYTEST_XDIST_WORKER') else 'test'
+logfile_name = os.path.join(log_path, '{}.{}.logs'.format(log_prefix, time.strftime('%Y%m%d')))
 
-class RecordLog:
-    def __init__(self):
-        self.handle_overdue_log()
+LOG_FORMAT = ('%(levelname)s - %(asctime)s - %(filename)s:%(lineno)d -'
+              '[%(module)s:%(funcName)s] - %(message)s')
+
+# Argument types that cannot change after the call, so formatting them can wait
+_IMMUTABLE_ARGS = (str, bytes, int, float, bool, type(None), datetime.date)
+
+# LogCapture of the running test. A context variable, so only the test's own
+# thread (and the asyncio tasks it starts) is captured; records of other
+# threads are written directly instead of landing in whichever test runs.
+_capture = contextvars.ContextVar('log_capture', default=None)
+
+
+class LazyArg:
+    """Log argument computed only when the record is written, e.g. LazyArg(lambda: response.text)."""
+    __slots__ = ('func',)
+
+    def __init__(self, func):
+        self.func = func
+
+    def __str__(self):
+        return str(self.func())
+
+    __repr__ = __str__
+
+
+class CappedFormatter(logging.Formatter):
+    """Formatter that truncates messages longer than setting.LOG_MAX_MESSAGE characters."""
+
+    def formatMessage(self, record):
+        limit = setting.LOG_MAX_MESSAGE
+        message = record.message
+        if limit and len(message) > limit:
+            record.message = f'{message[:limit]}... [truncated {len(message) - limit} chars]'
+        return super().formatMessage(record)
+
+
+class LogCapture:
+    """Ring buffer holding the newest records of one test; older ones are dropped."""
+
+    def __init__(self, capacity):
+        self.records = collections.deque(maxlen=capacity)
+        self.total = 0
 
+    def append(self, record):
+        self.records.append(record)
+        self.total += 1
 
-    @staticmethod
-    def handle_overdue_log():
-        """Delete logs older than 7 days"""
+    @property
+    def dropped(self):
+        return self.total - len(self.records)
 
-        # 1. Calculate the timestamp for 7 days ago
-        now_time = datetime.datetime.now()
-        offset_date = datetime.timedelta(days=-7)
-        before_date = (now_time + offset_date).timestamp()
 
-        # 2. Delete files older than 7 days
-        for file in os.listdir(log_path):
-            file_name = os.path.join(log_path, file)
-            if os.path.isfile(file_name):
-                file_create_time = os.path.getctime(file_name)
-                if file_create_time < before_date:
-                    os.remove(file_name)
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+    The stock handler formats every record in the calling thread; here only
+    tracebacks and mutable arguments (dicts, lists...) are rendered up front,
+    so the caller pays for little more than putting the record on the queue.
+    """
 
-    @staticmethod
-    def output_logging():
+    def prepare(self, record):
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        args = record.args
+        if args and (isinstance(args, dict) or
+                     not all(isinstance(arg, _IMMUTABLE_ARGS + (LazyArg,)) for arg in args)):
+            record.msg, record.args = record.getMessage(), None
+        return record
+
+    def emit(self, record):
+        try:
+            record = self.prepare(record)
+            capture = _capture.get()
+            if capture is not None:
+                capture.append(record)
+            else:
+                self.enqueue(record)
+        except Exception:
+            self.handleError(record)
+
+
+class ArchivingFileHandler(RotatingFileHandler):
+    """Rotates into timestamped segments that the archiver gzips in the background."""
+
+    def __init__(self, filename, archiver, prefix='test', **kwargs):
+        self.archiver = archiver
+        self.prefix = prefix
+        super().__init__(filename, **kwargs)
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename):
+            segment = segment_name(os.path.dirname(self.baseFilename), self.prefix)
+            os.replace(self.baseFilename, segment)
+            self.archiver.archive(segment)
+        if not self.delay:
+            self.stream = self._open()
+
+
+class RecordLog:
+    def __init__(self):
+        self.listener = None
+        self.handler = None
+        # Compressing leftover segments and retention run off the import path
+        self.archiver = LogArchiver(log_path)
+        self.archiver.recover(logfile_name)
+
+    def output_logging(self):
         logger = logging.getLogger(__name__)
         if not logger.handlers:
             # 1. Create logger
             logger.setLevel(setting.LOG_LEVEL)
-            logger_format = logging.Formatter( '%(levelname)s - %(asctime)s -'
-                                                  ' %(filename)s:%(lineno)d -[%(module)s:'
-                                                  '%(funcName)s] - %(message)s')
+            logger_format = CappedFormatter(LOG_FORMAT)
 
             # 2. Create file handler
-            fh = RotatingFileHandler(filename=logfile_name,mode='a',maxBytes=1024*1024*5,
-                                     backupCount=5, encoding='utf-8')
+            fh = ArchivingFileHandler(logfile_name, self.archiver, log_prefix, mode='a',
+                                      maxBytes=setting.LOG_MAX_BYTES, encoding='utf-8')
             fh.setLevel(setting.LOG_LEVEL)
             fh.setFormatter(logger_format)
-            logger.addHandler(fh)
 
             # 3. Create console handler
             sh = logging.StreamHandler()
             sh.setLevel(setting.CONSOLE_LOG_LEVEL)
             sh.setFormatter(logger_format)
-            logger.addHandler(sh)
+
+            # 4. Callers only enqueue records, a background thread formats and writes them
+            log_queue = queue.SimpleQueue()
+            self.handler = DeferredQueueHandler(log_queue)
+            logger.addHandler(self.handler)
+            self.listener = QueueListener(log_queue, fh, sh, respect_handler_level=True)
+            self.listener.start()
+            # Drain the queue before the interpreter exits
+            atexit.register(self.listener.stop)
         return logger
 
-logs = RecordLog().output_logging()
+    def start_capture(self, capacity=None):
+        """
+        Buffer the following records of the current thread/context in memory
+        instead of writing them (see setting.LOG_CAPTURE).
+        """
+        _capture.set(LogCapture(capacity or setting.LOG_CAPTURE_RECORDS))
+
+    def stop_capture(self):
+        """Discard the buffered records of the current context and write directly again."""
+        _capture.set(None)
+
+    def flush_capture(self, title):
+        """
+        Write the buffered records to the log and stop capturing, so later
+        records of the same test are written directly.
+        :return: the buffered records as text, None when nothing was captured
+        """
+        capture = _capture.get()
+        _capture.set(None)
+        if capture is None or not capture.records:
+            return None
+        formatter = CappedFormatter(LOG_FORMAT)
+        header = f'----- {title}: {len(capture.records)} captured records'
+        if capture.dropped:
+            header += f', {capture.dropped} older records dropped'
+        lines = [header + ' -----']
+        # Format before handing the records to the writer thread, it formats them too
+        lines.extend(formatter.format(record) for record in capture.records)
+        self.handler.enqueue(logging.makeLogRecord({
+            'name': __name__, 'levelno': logging.ERROR, 'levelname': 'ERROR', 'msg': header + ' -----',
+            'filename': 'record_log.py', 'module': 'record_log', 'funcName': 'flush_capture'}))
+        for record in capture.records:
+            self.handler.enqueue(record)
+        return '\n'.join(lines)
+
+
+record_log = RecordLog()
+logs = record_log.output_logging()
 
 if __name__ == '__main__':
     logs.debug('this is a debug log')
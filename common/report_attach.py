@@ -0,0 +1,123 @@
+"""Allure attachment policy.
+
+setting.ALLURE_ATTACH_MODE decides which tests write their attachments:
+
+    always   -- every attachment is written right away (previous behaviour)
+    failure  -- attachments are held in memory and written only if the test fails
+    sampled  -- a stable share (ALLURE_ATTACH_SAMPLE_RATE) of tests behaves like
+                'always', the others like 'failure'
+
+Bodies larger than ALLURE_ATTACH_MAX_BYTES are truncated with a marker, and a
+body may be a callable so that e.g. pretty-printing only happens when the
+attachment is written. Request details of a case (API name, URL, method,
+headers, params...) are collected with `metadata()` and written as a single
+'Request Info' attachment instead of one file per field.
+
+Attachments are written through common.attachment_store, which stores each
+distinct body once. The root conftest drives the per-test lifecycle
+(begin / flush / end); outside a test everything is written immediately.
+"""
+
+import zlib
+
+import allure
+
+from common.attachment_store import attachment_store
+from conf import setting
+
+ALWAYS, FAILURE, SAMPLED = 'always', 'failure', 'sampled'
+
+
+def truncate(body, max_bytes=None):
+    """Cap a text/bytes body at max_bytes (UTF-8), appending a truncation marker."""
+    max_bytes = setting.ALLURE_ATTACH_MAX_BYTES if max_bytes is None else max_bytes
+    if not max_bytes:
+        return body
+    if isinstance(body, str):
+        # At most 4 bytes per character: short text needs no encoding to check
+        if len(body) * 4 <= max_bytes:
+            return body
+        data = body.encode('utf-8')
+        if len(data) <= max_bytes:
+            return body
+        return data[:max_bytes].decode('utf-8', 'ignore') + f'\n... [truncated {len(data) - max_bytes} bytes]'
+    if isinstance(body, (bytes, bytearray)) and len(body) > max_bytes:
+        return bytes(body[:max_bytes]) + f'\n... [truncated {len(body) - max_bytes} bytes]'.encode()
+    return body
+
+
+def is_sampled(nodeid, rate=None):
+    """Stable per-test decision, so the same tests are sampled on every run."""
+    rate = setting.ALLURE_ATTACH_SAMPLE_RATE if rate is None else rate
+    return zlib.crc32(nodeid.encode('utf-8')) / 0xFFFFFFFF < rate
+
+
+class AttachmentPolicy:
+
+    def __init__(self):
+        # None: no test running, write immediately
+        self.mode = None
+        self.pending = []
+        self.sections = []
+
+    def begin(self, nodeid):
+        mode = setting.ALLURE_ATTACH_MODE
+        if mode not in (ALWAYS, FAILURE, SAMPLED):
+            raise ValueError(f'ALLURE_ATTACH_MODE must be one of always/failure/sampled, got {mode!r}')
+        if mode == SAMPLED:
+            mode = ALWAYS if is_sampled(nodeid) else FAILURE
+        self.mode, self.pending, self.sections = mode, [], []
+
+    @staticmethod
+    def write(body, name, attachment_type=allure.attachment_type.TEXT, extension=None):
+        if callable(body):
+            body = body()
+        attachment_store.attach(truncate(body), name, attachment_type, extension)
+
+    def attach(self, body, name, attachment_type=allure.attachment_type.TEXT, extension=None):
+        """allure.attach under the policy; body may be a callable producing it."""
+        if self.mode == FAILURE:
+            self.pending.append((body, name, attachment_type, extension))
+        else:
+            self.write(body, name, attachment_type, extension)
+
+    def metadata(self, fields):
+        """
+        Add request details of the current case, e.g. {'URL': url, 'Method': method}.
+        A field the current case already has starts the section of the next case.
+        """
+        if self.mode is None:
+            self.write(self._render([fields]), 'Request Info')
+            return
+        if not self.sections or self.sections[-1].keys() & fields.keys():
+            self.sections.append({})
+        self.sections[-1].update(fields)
+
+    @staticmethod
+    def _render(sections):
+        return '\n\n'.join('\n'.join(f'{key}: {value}' for key, value in section.items())
+                           for section in sections)
+
+    def _write_metadata(self):
+        if self.sections:
+            sections, self.sections = self.sections, []
+            self.write(self._render(sections), 'Request Info')
+
+    def flush(self):
+        """The test failed: write everything held back; later attachments are written directly."""
+        if self.mode is None:
+            return
+        self._write_metadata()
+        pending, self.pending = self.pending, []
+        for args in pending:
+            self.write(*args)
+        self.mode = ALWAYS
+
+    def end(self):
+        """Last report phase of the test: write metadata unless attachments are held back."""
+        if self.mode == ALWAYS:
+            self._write_metadata()
+        self.mode, self.pending, self.sections = None, [], []
+
+
+attachments = AttachmentPolicy()
@@ -1,12 +1,16 @@
+import asyncio
+import contextvars
+import functools
 import json
-import allure
 import pytest
 import requests
 import urllib3
 
 from conf import setting
-from common.record_log import logs
+from common.record_log import logs, LazyArg
+from common.report_attach import attachments
 from common.operator_yaml import OperatorYaml
+from common.http_transport import get_transport
 
 
 
@@ -27,9 +31,10 @@ class SendRequest:
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
         try:
             if data is None:
-                response = requests.get(url, headers=header, cookies=self.cookie, verify=False)
+                response = get_transport().session.get(url, headers=header, cookies=self.cookie, verify=False)
             else:
-                response = requests.get(url, data, headers=header, cookies=self.cookie, verify=False)
+                response = get_transport().session.get(url, params=data, headers=header, cookies=self.cookie,
+                                                       verify=False)
         except requests.RequestException as e:
             logs.error(e)
             return None
@@ -49,9 +54,9 @@ class SendRequest:
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
         try:
             if data is None:
-                response = requests.post(url, header, cookies=self.cookie, verify=False)
+                response = get_transport().session.post(url, headers=header, cookies=self.cookie, verify=False)
             else:
-                response = requests.post(url, data, headers=header, cookies=self.cookie, verify=False)
+                response = get_transport().session.post(url, data, headers=header, cookies=self.cookie, verify=False)
         except requests.RequestException as e:
             logs.error(e)
             return None
@@ -79,22 +84,22 @@ class SendRequest:
         return response_dict
 
     def send_request(self, **kwargs):
-        """General request handler using requests.session()."""
-        session = requests.session()
+        """General request handler using the shared pooled transport."""
         result = None
         cookie = {}
 
         try:
-            result = session.request(**kwargs)
+            result = get_transport().request(**kwargs)
             set_cookie = requests.utils.dict_from_cookiejar(result.cookies)
 
             # Save cookies if returned by server
             if set_cookie:
                 cookie['Cookie'] = set_cookie
                 self.read.write_data(cookie)
-                logs.info("Cookie: %s" % cookie)
+                logs.info("Cookie: %s", cookie)
 
-            logs.info("Response: %s" % (result.text if result.text else result))
+            # Decoded by the log writer thread, only if the record is emitted
+            logs.info("Response: %s", LazyArg(lambda: result.text or result))
 
         except requests.exceptions.ConnectionError:
             logs.error("ConnectionError - Connection failed")
@@ -120,27 +125,41 @@ class SendRequest:
         :param kwargs: Request parameters (data/json/params)
         :return: Response object
         """
+        self.log_request(name, url, case_name, header, method, cookies, kwargs)
 
-        try:
-            # Log details for reports
-            logs.info('API Name: %s' % name)
-            logs.info('URL: %s' % url)
-            logs.info('Method: %s' % method)
-            logs.info('Case Name: %s' % case_name)
-            logs.info('Headers: %s' % header)
-            logs.info('Cookies: %s' % cookies)
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-            req_params = json.dumps(kwargs, ensure_ascii=False)
+        response = self.send_request(
+            method=method,
+            url=url,
+            headers=header,
+            cookies=cookies,
+            files=file,
+            timeout=setting.API_TIMEOUT,
+            verify=False,
+            **kwargs
+        )
 
-            if "data" in kwargs or "json" in kwargs or "params" in kwargs:
-                allure.attach(req_params, 'Request Parameters', allure.attachment_type.TEXT)
-                logs.info("Request Params: %s" % kwargs)
-        except Exception as e:
-            logs.error(e)
+        return response
+
+    async def run_main_async(self, name, url, case_name, header, method, cookies=None, file=None, executor=None,
+                             **kwargs):
+        """
+        Asyncio counterpart of run_main.
+        Logging and report attachments stay on the event loop thread, only the
+        blocking send is handed to `executor` so many requests can be in flight.
+        :param executor: concurrent.futures executor (loop default when None)
+        :return: Response object
+        """
+        self.log_request(name, url, case_name, header, method, cookies, kwargs)
 
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-        response = self.send_request(
+        loop = asyncio.get_running_loop()
+        # run_in_executor drops the context: copy it so the send logs into the test's log capture
+        context = contextvars.copy_context()
+        response = await loop.run_in_executor(executor, context.run, functools.partial(
+            self.send_request,
             method=method,
             url=url,
             headers=header,
@@ -149,6 +168,26 @@ class SendRequest:
             timeout=setting.API_TIMEOUT,
             verify=False,
             **kwargs
-        )
+        ))
 
         return response
+
+    @staticmethod
+    def log_request(name, url, case_name, header, method, cookies, kwargs):
+        """Log request details and attach request parameters to the report."""
+        try:
+            # Log details for reports
+            logs.info('API Name: %s', name)
+            logs.info('URL: %s', url)
+            logs.info('Method: %s', method)
+            logs.info('Case Name: %s', case_name)
+            logs.info('Headers: %s', header)
+            logs.info('Cookies: %s', cookies)
+
+            req_params = json.dumps(kwargs, ensure_ascii=False)
+
+            if "data" in kwargs or "json" in kwargs or "params" in kwargs:
+                attachments.metadata({'Request Parameters': req_params})
+                logs.info("Request Params: %s", req_params)
+        except Exception as e:
+            logs.error(e)
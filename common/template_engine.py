@@ -0,0 +1,218 @@
+"""Compiled ${func(args)} templates for YAML request data.
+
+Each header/params/json/validation block is parsed once into a substitution
+plan that records only the strings holding placeholders; rendering walks that
+plan and calls functions from one shared registry. A string that is exactly
+one placeholder keeps the function's native return type (int timestamps stay
+ints); placeholders inside a longer string are substituted as text. Lists
+returned by functions are joined with ',' as the old string-replace
+implementation did.
+
+Rendered dicts and lists are always fresh copies (scalars are shared), so
+callers may pop from or mutate the result without touching the cached YAML
+data or later renders of the same block.
+"""
+
+import functools
+import re
+import threading
+from collections import OrderedDict
+
+from common.record_log import logs
+
+PLACEHOLDER_PATTERN = re.compile(r'\$\{([^}(]+)\(([^)]*)\)\}')
+
+# Compiled plans for strings (by value) and dict/list blocks (by object id; the
+# block is kept alive by its cache entry so the id cannot be reused meanwhile)
+PLAN_CACHE_SIZE = 4096
+
+
+class FunctionRegistry:
+    """Name -> callable table shared by every template render."""
+
+    def __init__(self):
+        self._functions = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load_defaults(self):
+        # DebugTalk imports the extract/config readers, load it on first use only
+        from common.debugtalk import DebugTalk
+        debug_talk = DebugTalk()
+        for name in dir(debug_talk):
+            if not name.startswith('_'):
+                func = getattr(debug_talk, name)
+                if callable(func):
+                    self._functions.setdefault(name, func)
+        self._loaded = True
+
+    def register(self, name, func):
+        """Register (or override) a template function."""
+        self._functions[name] = func
+
+    def get(self, name):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load_defaults()
+        try:
+            return self._functions[name]
+        except KeyError:
+            raise NameError(f'Template function {name}() is not defined') from None
+
+
+registry = FunctionRegistry()
+
+
+def register_function(name=None):
+    """Decorator that makes a function usable as ${name(...)} in YAML."""
+
+    def decorator(func):
+        registry.register(name or func.__name__, func)
+        return func
+
+    return decorator
+
+
+class _Call:
+    """One parsed ${func(args)} placeholder."""
+    __slots__ = ('func_name', 'args')
+
+    def __init__(self, func_name, params):
+        self.func_name = func_name
+        self.args = tuple(params.split(',')) if params else ()
+
+    def evaluate(self):
+        value = registry.get(self.func_name)(*self.args)
+        if value and isinstance(value, list):
+            value = ','.join(str(v) for v in value)
+        return value
+
+
+class _StringPlan:
+    """Literal text interleaved with placeholder calls."""
+    __slots__ = ('parts',)
+
+    def __init__(self, parts):
+        self.parts = parts
+
+    def render(self):
+        if len(self.parts) == 1:
+            return self.parts[0].evaluate()
+        return ''.join(part if isinstance(part, str) else str(part.evaluate()) for part in self.parts)
+
+
+def _clone(value):
+    """Copy nested dicts/lists; scalars are immutable and shared."""
+    if isinstance(value, dict):
+        return {k: _clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone(v) for v in value]
+    return value
+
+
+def _static_containers(source, dynamic):
+    """Keys/indexes of nested containers without placeholders, copied on every render."""
+    dynamic_keys = {key for key, _ in dynamic}
+    items = source.items() if isinstance(source, dict) else enumerate(source)
+    return [key for key, value in items if key not in dynamic_keys and isinstance(value, (dict, list))]
+
+
+class _DictPlan:
+    __slots__ = ('source', 'dynamic', 'nested')
+
+    def __init__(self, source, dynamic):
+        self.source = source
+        self.dynamic = dynamic
+        self.nested = _static_containers(source, dynamic)
+
+    def render(self):
+        result = dict(self.source)
+        for key in self.nested:
+            result[key] = _clone(result[key])
+        for key, plan in self.dynamic:
+            result[key] = plan.render()
+        return result
+
+
+class _ListPlan:
+    __slots__ = ('source', 'dynamic', 'nested')
+
+    def __init__(self, source, dynamic):
+        self.source = source
+        self.dynamic = dynamic
+        self.nested = _static_containers(source, dynamic)
+
+    def render(self):
+        result = list(self.source)
+        for index in self.nested:
+            result[index] = _clone(result[index])
+        for index, plan in self.dynamic:
+            result[index] = plan.render()
+        return result
+
+
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _compile_string(text):
+    plan = None
+    if '${' in text:
+        parts, pos = [], 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            if match.start() > pos:
+                parts.append(text[pos:match.start()])
+            parts.append(_Call(match.group(1), match.group(2)))
+            pos = match.end()
+        if pos < len(text):
+            parts.append(text[pos:])
+        if any(isinstance(part, _Call) for part in parts):
+            plan = _StringPlan(parts)
+        else:
+            logs.warning(f'Template: malformed placeholder left as text: {text}')
+    return plan
+
+
+def _compile_node(value):
+    """Return a plan for value, or None when it holds no placeholders."""
+    if isinstance(value, str):
+        return _compile_string(value)
+    if isinstance(value, dict):
+        dynamic = [(k, p) for k, p in ((k, _compile_node(v)) for k, v in value.items()) if p is not None]
+        return _DictPlan(value, dynamic) if dynamic else None
+    if isinstance(value, list):
+        dynamic = [(i, p) for i, p in ((i, _compile_node(v)) for i, v in enumerate(value)) if p is not None]
+        return _ListPlan(value, dynamic) if dynamic else None
+    return None
+
+
+def compile_template(data):
+    """Compile (or fetch the cached plan of) a YAML block; None means static."""
+    if isinstance(data, str):
+        return _compile_string(data)
+    if not isinstance(data, (dict, list)):
+        return None
+
+    key = id(data)
+    with _plans_lock:
+        entry = _plans.get(key)
+        if entry is not None:
+            _plans.move_to_end(key)
+            return entry[1]
+
+    plan = _compile_node(data)
+    with _plans_lock:
+        _plans[key] = (data, plan)
+        if len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def render(data):
+    """Resolve every ${func(args)} placeholder in data."""
+    plan = compile_template(data)
+    if plan is None:
+        return _clone(data)
+    return plan.render()
@@ -1,65 +1,164 @@
 import sys
 import os
+import re
+import threading
+import time
 import traceback
 import configparser
+from types import MappingProxyType
 from conf import setting
 from common.record_log import logs
 
+# Environment variables TF_<SECTION>_<OPTION> override options of config.ini,
+# e.g. TF_API_ENVI_HOST or TF_MYSQL_PASSWORD
+ENV_PREFIX = 'TF_'
+
+
+def env_name(section_name, option_name):
+    """Environment variable that overrides one option."""
+    return ENV_PREFIX + re.sub(r'\W', '_', f'{section_name}_{option_name}').upper()
+
+
+class ConfigSnapshot:
+    """Parsed, read-only view of a config file with environment overrides applied."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        try:
+            stat = os.stat(filename)
+            self.key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            self.key = None
+
+        parser = configparser.ConfigParser()
+        try:
+            parser.read(filename, encoding='utf-8')
+        except configparser.Error:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            logs.error(str(traceback.format_exc(exc_traceback)))
+
+        sections = {}
+        for section_name in parser.sections():
+            options = dict(parser.items(section_name))
+            for option_name in options:
+                override = os.environ.get(env_name(section_name, option_name))
+                if override is not None:
+                    options[option_name] = override
+            sections[section_name] = MappingProxyType(options)
+        self.sections = MappingProxyType(sections)
+        self.checked = time.monotonic()
+        logs.debug(f'Config file {filename} successfully read')
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(filename):
+    """
+    Process-wide snapshot of a config file. The file's mtime/size is checked
+    at most every setting.CONFIG_RELOAD_INTERVAL seconds and the file is
+    only parsed again when it changed.
+    """
+    snapshot = _snapshots.get(filename)
+    if snapshot is not None and time.monotonic() - snapshot.checked < setting.CONFIG_RELOAD_INTERVAL:
+        return snapshot
+    with _snapshots_lock:
+        snapshot = _snapshots.get(filename)
+        if snapshot is not None:
+            try:
+                stat = os.stat(filename)
+                current = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                current = None
+            if current == snapshot.key:
+                snapshot.checked = time.monotonic()
+                return snapshot
+        snapshot = ConfigSnapshot(filename)
+        _snapshots[filename] = snapshot
+        return snapshot
+
+
+def invalidate_config(filename=None):
+    """Drop cached snapshots (one file, or all) so the next lookup re-reads them."""
+    with _snapshots_lock:
+        if filename is None:
+            _snapshots.clear()
+        else:
+            _snapshots.pop(os.path.abspath(filename), None)
+
+
 class OperatorConfig:
+    _BOOLEANS = configparser.ConfigParser.BOOLEAN_STATES
+
     def __init__(self, filename=None):
         # 1. Determine the configuration file path
         if filename is None:
             self.__filename = setting.FILE_PATH['CONFIG']
         else:
             self.__filename = filename
+        self.__filename = os.path.abspath(self.__filename)
 
-        # 2. Read the configuration file
-        self.config = configparser.ConfigParser()
-        try:
-            self.config.read(self.__filename, encoding='utf-8')
-        except configparser.MissingSectionHeaderError :
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            logs.error(str(traceback.format_exc(exc_traceback)))
-
-        logs.debug(f'Config file{self.__filename} successfully read')
-
+    @property
+    def snapshot(self):
+        """Current parsed snapshot; cheap, shared by every OperatorConfig of the file."""
+        return get_snapshot(self.__filename)
 
     def get_item_value(self,section_name):
         try:
-            items = self.config.items(section_name)
-        except configparser.NoSectionError :
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            logs.error(str(traceback.format_exc(exc_traceback)))
+            return dict(self.snapshot.sections[section_name])
+        except KeyError:
+            logs.error(f'Config section [{section_name}] not found in {self.__filename}')
             return None
-        logs.debug(f'Get config items: section [{section_name}] = {items}')
-        return dict(items)
 
     def get_section_for_data(self,section_name,option_name):
-        try :
-            value = self.config.get(section_name,option_name)
-        except configparser.NoOptionError :
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            logs.error(str(traceback.format_exc(exc_traceback)))
+        section = self.snapshot.sections.get(section_name)
+        if section is None:
+            logs.error(f'Config section [{section_name}] not found in {self.__filename}')
             return None
-        except configparser.NoSectionError :
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            logs.error(str(traceback.format_exc(exc_traceback)))
+        try:
+            return section[option_name.lower()]
+        except KeyError:
+            logs.error(f'Config option [{section_name}] {option_name} not found in {self.__filename}')
             return None
 
-        logs.debug(f'Get config value: section [{section_name}] option [{option_name}] = {value}')
-        return value
+    def get_int(self, section_name, option_name, default=None):
+        value = self.get_section_for_data(section_name, option_name)
+        return default if value in (None, '') else int(value)
 
-    def write_config(self,section_name,option_name,option_value):
-        # 1. Write data to the configuration file
-        if section_name not in self.config.sections():
-            self.config.add_section(section_name)
-        self.config.set(section_name,option_name,option_value)
+    def get_float(self, section_name, option_name, default=None):
+        value = self.get_section_for_data(section_name, option_name)
+        return default if value in (None, '') else float(value)
 
-        # 2. Save the configuration file
+    def get_bool(self, section_name, option_name, default=None):
+        value = self.get_section_for_data(section_name, option_name)
+        if value in (None, ''):
+            return default
+        try:
+            return self._BOOLEANS[value.lower()]
+        except KeyError:
+            raise ValueError(f'Config option [{section_name}] {option_name} is not a boolean: {value}') from None
+
+    def get_list(self, section_name, option_name, sep=',', default=None):
+        value = self.get_section_for_data(section_name, option_name)
+        if value in (None, ''):
+            return default
+        return [item.strip() for item in value.split(sep) if item.strip()]
+
+    def write_config(self,section_name,option_name,option_value):
+        # 1. Write data to the configuration file (as stored on disk, without environment overrides)
+        config = configparser.ConfigParser()
+        config.read(self.__filename, encoding='utf-8')
+        if section_name not in config.sections():
+            config.add_section(section_name)
+        config.set(section_name,option_name,option_value)
+
+        # 2. Save the configuration file and drop the cached snapshot
         tmp = self.__filename + '.tmp'
         with open(tmp,'w',encoding='utf-8') as configfile:
-            self.config.write(configfile)
+            config.write(configfile)
         os.replace(tmp,self.__filename)
+        invalidate_config(self.__filename)
 
     def get_section_mysql(self, option):
         return self.get_section_for_data("MYSQL", option)
@@ -80,4 +179,4 @@ class OperatorConfig:
         return self.get_section_for_data("SSH", option)
 
     def get_section_jenkins(self, option):
-        return self.get_section_for_data("JENKINS", option)
\ No newline at end of file
+        return self.get_section_for_data("JENKINS", option)
@@ -7,15 +7,73 @@ sys.path.append(ROOT_DIR)
 
 LOG_LEVEL = logging.INFO  # Set file logging level
 CONSOLE_LOG_LEVEL = logging.DEBUG  # Set console logging level
+LOG_MAX_MESSAGE = 10000  # Longer log messages are truncated (0 = no limit)
+LOG_MAX_BYTES = 1024 * 1024 * 5  # The log file is closed and gzipped at this size
+LOG_RETENTION_DAYS = 7  # Compressed segments older than this are deleted (0 = keep)
+LOG_RETENTION_BYTES = 1024 * 1024 * 500  # Oldest compressed segments are deleted beyond this total (0 = no limit)
+# Keep each test's log records in memory and write/attach them only when the test fails
+LOG_CAPTURE = False
+LOG_CAPTURE_RECORDS = 5000  # Ring buffer size per test, older records are dropped
+
+# Allure attachments: 'always', 'failure' (only failed tests) or 'sampled'
+ALLURE_ATTACH_MODE = 'always'
+ALLURE_ATTACH_SAMPLE_RATE = 0.1  # Share of tests with full attachments in 'sampled' mode
+ALLURE_ATTACH_MAX_BYTES = 256 * 1024  # Larger attachment bodies are truncated (0 = no limit)
+# Opt-in: attachments of this size or more are stored gzipped (0 = never). The report then
+# offers them as .gz downloads instead of showing them inline
+ALLURE_GZIP_BYTES = 0
 
 API_TIMEOUT = 60  # API request timeout in seconds
 
+# Shared HTTP transport: per-host connection pools reused across test cases
+HTTP_POOL = {
+    'pool_connections': 20,  # Number of host pools kept open
+    'pool_maxsize': 50,  # Max keep-alive connections per host
+    'pool_block': False,  # Block instead of opening extra connections when a pool is full
+    'max_retries': 0,  # Transport-level retries
+    'keep_alive': True,  # Reuse connections between requests
+    'tcp_keepalive': True  # Enable TCP keepalive probes on idle pooled sockets
+}
+
+MYSQL_POOL = {
+    'max_size': 10,  # Max open MySQL connections shared by the session
+    'timeout': 30,  # Seconds to wait for a free connection before failing
+    'ping_interval': 30  # Ping connections idle longer than this (seconds) before reuse
+}
+
+# Test data seeded into MySQL for the session by testcase/conftest.py::datadb_init.
+# Files or directories relative to ROOT_DIR (YAML, CSV or XML, e.g. 'data/sql').
+SEED_DATASETS = []
+SEED_CLEANUP = 'delete'  # 'delete': batched delete of seeded keys, 'rollback': never commit the seeded rows
+SEED_BATCH_SIZE = 1000  # Rows per executemany / keys per DELETE statement
+
+# Roll back each test's pooled MySQL work at teardown (per test: @pytest.mark.db_isolation)
+DB_ISOLATION = False
+# Isolation level of those test transactions: READ COMMITTED lets later db assertions of a test
+# see rows the application commits meanwhile (None: server default, REPEATABLE READ on InnoDB)
+DB_ISOLATION_LEVEL = 'READ COMMITTED'
+
+SSH_MAX_WORKERS = 16  # Hosts reached in parallel by SSHConnection.run_on_hosts
+
+ASYNC_CONCURRENCY = 50  # Max YAML cases in flight in the asyncio engine (keep <= HTTP_POOL['pool_maxsize'])
+
 SHEET_ID = 0  # Excel Sheet ID
 
 REPORT_TYPE = 'allure'  # Report type: allure or tm
 
 dd_msg = False  # Enable DingTalk message notifications
 
+# Extracted variable store: 'yaml' (extract.yaml + journal) or 'sqlite' (safe for pytest-xdist)
+EXTRACT_BACKEND = 'yaml'
+# SQLite namespace: 'worker' gives each xdist worker its own keys, any other value is shared
+EXTRACT_NAMESPACE = 'worker'
+
+CONFIG_RELOAD_INTERVAL = 1.0  # Seconds between config.ini change checks (mtime/size) of the cached snapshot
+
+IMPORT_TIME_BUDGET = 1.0  # Seconds allowed to import an HTTP-only run (checked by python -m base.import_budget)
+
+CASE_CACHE = True  # Cache parsed YAML test cases between runs, re-parsing only changed files
+
 # Define commonly used file paths
 FILE_PATH = {
     'CONFIG': os.path.join(ROOT_DIR, 'conf/config.ini'),
@@ -24,6 +82,8 @@ FILE_PATH = {
     'TEMP': os.path.join(ROOT_DIR, 'report/temp'),
     'TMR': os.path.join(ROOT_DIR, 'report/tm_report'),
     'EXTRACT': os.path.join(ROOT_DIR, 'extract.yaml'),
+    'EXTRACT_DB': os.path.join(ROOT_DIR, 'report', 'extract.db'),
+    'CASE_CACHE': os.path.join(ROOT_DIR, '.case_cache'),
     'XML': os.path.join(ROOT_DIR, 'data/sql'),
     'RESULT_XML': os.path.join(ROOT_DIR, 'report'),
     'EXCEL': os.path.join(ROOT_DIR, 'data', 'test_data.xlsx'),
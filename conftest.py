@@ -1,24 +1,148 @@
 # -*- coding: utf-8 -*-
+import os
+import sys
 import time
+import allure
 import pytest
 import warnings
 
 from common.operator_yaml import OperatorYaml
 from base.remove_file import remove_files
 from common.ding_robot import send_dd_msg
+from common.http_transport import close_transport
+from common.extract_store import compact_all, shared_across_workers
+from common.record_log import record_log
+from common.report_attach import attachments
+from common.attachment_store import attachment_store
+from conf import setting
 from conf.setting import dd_msg
 
 yfd = OperatorYaml()
 
+# API suites; sessions without them (e.g. the framework tests under tests/) keep extract.yaml and report/temp
+CASE_DIR = os.path.join(os.path.abspath(setting.ROOT_DIR), 'testcase')
+
+
+def is_api_case(path):
+    return str(path).startswith(CASE_DIR + os.sep)
+
+
+def targets_api_cases(config):
+    """True when the command-line paths (or testpaths) include YAML cases under testcase/."""
+    for arg in config.args:
+        path = os.path.abspath(str(arg).split('::')[0])
+        if path == CASE_DIR or is_api_case(path) or CASE_DIR.startswith(path + os.sep):
+            return True
+    return False
+
 
 @pytest.fixture(scope="session", autouse=True)
-def clear_extract():
+def clear_extract(request):
     # Ignore HTTPS and Resource warnings
     warnings.simplefilter('ignore', ResourceWarning)
 
-    # Clear YAML data and remove temporary report files
-    yfd.clear_data()
-    remove_files("./report/temp", ['json', 'txt', 'attach', 'properties'])
+    # Clear YAML data and remove temporary report files of API runs;
+    # data shared by xdist workers is cleared once by the controller (pytest_configure)
+    if any(is_api_case(item.path) for item in request.session.items):
+        if not (os.environ.get('PYTEST_XDIST_WORKER') and shared_across_workers()):
+            yfd.clear_data()
+        remove_files("./report/temp", ['json', 'txt', 'attach', 'properties', 'gz'])
+    yield
+    # Fold the extract journal back into extract.yaml
+    compact_all()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def http_transport():
+    # Close pooled keep-alive connections once the whole session is done
+    yield
+    close_transport()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database_pools():
+    # Close pooled database connections; they only exist if a suite used a database
+    yield
+    connection = sys.modules.get('common.connection')
+    if connection is not None:
+        connection.close_connections()
+
+
+def pytest_configure(config):
+    # Attachments are stored by content hash in the --alluredir directory
+    attachment_store.configure(config)
+    # xdist controller: clear the extract data the workers share before any of them starts
+    if (config.getoption('numprocesses', None) and not hasattr(config, 'workerinput')
+            and shared_across_workers() and targets_api_cases(config)):
+        yfd.clear_data()
+    config.addinivalue_line('markers', "db_isolation: roll back the test's MySQL work at teardown")
+
+
+def pytest_collection_modifyitems(session, config, items):
+    # YAML cases run after the cases whose extracted values they read, no hand-pinned orders
+    if not any(is_api_case(item.path) for item in items):
+        return
+    from base.dag_scheduler import CaseGraph
+    graph = CaseGraph.from_paths(CASE_DIR)
+    items[:] = graph.order_items(items)
+    _upstream_items.update({item.nodeid: {dep.nodeid for dep in deps}
+                            for item, deps in graph.upstream_items(items).items()})
+
+
+# nodeid -> nodeids of the cases whose extracted data the case reads, and the cases that did not pass
+_upstream_items = {}
+_failed_items = set()
+
+
+def pytest_runtest_setup(item):
+    # Like DagScheduler, a case is skipped when a case producing its data failed
+    failed = sorted(_upstream_items.get(item.nodeid, set()) & _failed_items)
+    if failed:
+        # Skipped cases count as not passed for their own downstream cases
+        _failed_items.add(item.nodeid)
+        pytest.skip(f'upstream case {failed[0]} did not pass')
+
+
+@pytest.fixture(autouse=True)
+def db_isolation(request):
+    # Each test's pooled MySQL work runs in its own transaction and is rolled back,
+    # so no cleanup SQL is needed
+    if not (setting.DB_ISOLATION or request.node.get_closest_marker('db_isolation')):
+        yield
+        return
+    from common.connection import get_mysql_pool
+    with get_mysql_pool().isolation():
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    # Attachments follow setting.ALLURE_ATTACH_MODE; with LOG_CAPTURE, a test's
+    # log records stay in memory unless it fails
+    attachments.begin(item.nodeid)
+    if setting.LOG_CAPTURE:
+        record_log.start_capture()
+    try:
+        yield
+    finally:
+        record_log.stop_capture()
+        attachments.end()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.failed:
+        _failed_items.add(item.nodeid)
+        attachments.flush()
+        if setting.LOG_CAPTURE:
+            text = record_log.flush_capture(f'{item.nodeid} {report.when} failed')
+            if text:
+                attachment_store.attach(text, 'Log', allure.attachment_type.TEXT)
+    if report.when == 'teardown':
+        # Still inside the test's report, after this the result is written
+        attachments.end()
 
 
 def generate_test_summary(terminal_reporter):
@@ -28,7 +152,11 @@ def generate_test_summary(terminal_reporter):
     failed = len(terminal_reporter.stats.get('failed', []))
     error = len(terminal_reporter.stats.get('error', []))
     skipped = len(terminal_reporter.stats.get('skipped', []))
-    duration = time.time() - terminal_reporter._sessionstarttime
+    if hasattr(terminal_reporter, '_sessionstarttime'):
+        duration = time.time() - terminal_reporter._sessionstarttime
+    else:
+        # pytest >= 8.4 keeps the start as a timing.Instant
+        duration = terminal_reporter._session_start.elapsed().seconds
 
     summary = f"""
     Automation Test Results Summary:
@@ -43,8 +171,8 @@ def generate_test_summary(terminal_reporter):
     return summary
 
 
-def pytest_terminal_summary(terminal_reporter):
+def pytest_terminal_summary(terminalreporter):
     """Collect pytest results and print/send summary"""
-    summary = generate_test_summary(terminal_reporter)
+    summary = generate_test_summary(terminalreporter)
     if dd_msg:
         send_dd_msg(summary)
@@ -15,5 +15,5 @@ if __name__ == '__main__':
         os.system('allure serve ./report/temp')
 
     elif REPORT_TYPE == 'tm':
-        pytest.main(['-vs', '--pytest-tmreport-name=testReport.html', '--pytest-tmreport-path=./report/tmreport'])
+        pytest.main(['-vs', './testcase', '--pytest-tmreport-name=testReport.html', '--pytest-tmreport-path=./report/tmreport'])
         webbrowser.open_new_tab(os.getcwd() + '/report/tmreport/testReport.html')
@@ -3,7 +3,8 @@ import allure
 from common.operator_yaml import get_testcase_yaml
 from base.api_util import RequestBase
 from common.record_log import logs
-from common.connection import MysqlConnection
+from common.data_seeder import DataSeeder, load_datasets
+from conf import setting
 
 
 @pytest.fixture(autouse=True)
@@ -29,12 +30,16 @@ def datadb_init():
     """
     后置处理器，比如测试之后的数据清理
     数据库可以预先预置一批本次测试的数据，在测试完成之后将这批数据清理，就不会对系统造成影响，也不会产生脏数据
+    预置数据由 setting.SEED_DATASETS 声明（YAML/CSV/XML），在一个事务中批量写入
     :return:
     """
-    # conn = MysqlConnection()
-    # yield
-    # sql = "delete from sys_user where login_name='test999'"
-    # conn.delete(sql)
-    # allure.attach('将测试数据清空', 'fixture后置', allure.attachment_type.TEXT)
+    if not setting.SEED_DATASETS:
+        yield
+        return
 
-    pass
+    seeder = DataSeeder(load_datasets(*setting.SEED_DATASETS), cleanup=setting.SEED_CLEANUP,
+                        batch_size=setting.SEED_BATCH_SIZE)
+    seeder.seed()
+    yield
+    seeder.cleanup()
+    allure.attach('将测试数据清空', 'fixture后置', allure.attachment_type.TEXT)
@@ -0,0 +1,104 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from common.connection import MysqlPool
+from conf.operator_config import env_name, invalidate_config
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Answers every request with a JSON envelope describing it."""
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+        payload = json.dumps({'code': 0, 'msg': 'ok', 'method': self.command, 'path': self.path,
+                              'body': body}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='session')
+def api_server():
+    """Local HTTP server; its address is the api_envi host for the session."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host = 'http://127.0.0.1:%s' % server.server_address[1]
+    mp = pytest.MonkeyPatch()
+    mp.setenv(env_name('api_envi', 'host'), host)
+    invalidate_config()
+    yield host
+    mp.undo()
+    invalidate_config()
+    server.shutdown()
+    server.server_close()
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, args=None):
+        self.conn.log.append(query)
+
+    def executemany(self, query, rows):
+        self.conn.log.append((query, list(rows)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    """Records the statements a pooled MySQL connection receives."""
+
+    def __init__(self):
+        self.log = []
+        self.closed = False
+
+    def begin(self):
+        self.log.append('BEGIN')
+
+    def commit(self):
+        self.log.append('COMMIT')
+
+    def rollback(self):
+        self.log.append('ROLLBACK')
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def mysql_pool(monkeypatch):
+    """MysqlPool handing out FakeConnections, listed in pool.connections."""
+    pool = MysqlPool(mysql_conf={'database': 'test'}, pool_conf={'max_size': 2, 'timeout': 0.05})
+    pool.connections = []
+
+    def connect():
+        conn = FakeConnection()
+        pool.connections.append(conn)
+        pool.created += 1
+        return conn
+
+    monkeypatch.setattr(pool, '_connect', connect)
+    return pool
@@ -0,0 +1,35 @@
+import pytest
+
+from common.assertions import IncludeAssertion, compile_validation
+from common.operator_yaml import get_testcase_yaml
+from conf.setting import ROOT_DIR
+
+RESPONSE = {'status': 'ok', 'data': {'token': 'tk-1'}}
+
+
+def test_inc_checks_key_presence():
+    plan = compile_validation([{'inc': 'status'}, {'inc': ['token']}])
+    assert [type(rule) for rule in plan.rules] == [IncludeAssertion, IncludeAssertion]
+    assert plan.check(RESPONSE, 200) == 0
+    assert compile_validation([{'inc': 'missing'}]).check(RESPONSE, 200) == 1
+
+
+def test_inc_uses_precomputed_matches():
+    plan = compile_validation("[{'inc': 'status'}]")
+    assert plan.paths() == ['$..status']
+    assert plan.check({}, 200, {'$..status': ['ok']}) == 0
+    assert plan.check(RESPONSE, 200, {'$..status': []}) == 1
+
+
+@pytest.mark.parametrize('expected', ['', [], [1], {'status': 1}])
+def test_inc_rejects_malformed_keys(expected):
+    with pytest.raises(ValueError, match='"inc" assertion'):
+        compile_validation([{'inc': expected}])
+
+
+def test_api_type_case_keeps_legacy_inc():
+    cases = get_testcase_yaml(f'{ROOT_DIR}/testcase/ProductManager/apiType.yaml')
+    # Validation blocks without placeholders are compiled when the YAML is loaded
+    plan = compile_validation(cases[0][1]['validation'])
+    assert plan.raw == [{'inc': 'status'}]
+    assert plan.paths() == ['$..status']
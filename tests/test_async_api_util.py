@@ -0,0 +1,29 @@
+import pytest
+
+from base.async_api_util import AsyncRequestBase
+
+
+def make_case(name, path, validation):
+    base_info = {'api_name': name, 'url': path, 'method': 'get', 'header': {'Accept': 'application/json'}}
+    test_case = {'case_name': name, 'params': {'q': name}, 'validation': validation}
+    return [base_info, test_case]
+
+
+def test_run_all_runs_a_batch(api_server):
+    cases = [make_case(f'case{i}', f'/items/{i}', [{'contains': {'status_code': 200}}, {'eq': {'msg': 'ok'}}])
+             for i in range(5)]
+
+    results = AsyncRequestBase(concurrency=3).run_all(cases)
+
+    assert [r['case_name'] for r in results] == [f'case{i}' for i in range(5)]
+    assert all(r['status'] == 'passed' for r in results)
+    # The caller's case dicts are left intact
+    assert all('case_name' in test_case for _, test_case in cases)
+
+
+def test_run_all_reports_failed_cases(api_server):
+    cases = [make_case('good', '/good', [{'eq': {'msg': 'ok'}}]),
+             make_case('bad', '/bad', [{'eq': {'msg': 'not ok'}}])]
+
+    with pytest.raises(AssertionError, match=r'1 of 2 cases did not pass:\n\[failed\] bad'):
+        AsyncRequestBase(concurrency=2).run_all(cases)
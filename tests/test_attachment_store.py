@@ -0,0 +1,73 @@
+import gzip
+from types import SimpleNamespace
+
+import allure
+import pytest
+from allure_commons import model2
+
+from common.attachment_store import AttachmentStore
+from conf import setting
+
+
+class FakeReporter:
+    def __init__(self):
+        self.item = model2.TestResult()
+
+    def get_last_item(self, item_type=None):
+        return self.item
+
+
+@pytest.fixture
+def store(tmp_path):
+    reporter = FakeReporter()
+    config = SimpleNamespace(
+        getoption=lambda name, default=None: str(tmp_path),
+        pluginmanager=SimpleNamespace(get_plugin=lambda name: SimpleNamespace(allure_logger=reporter)))
+    store = AttachmentStore()
+    store.configure(config)
+    store.item = reporter.item
+    return store
+
+
+def read(tmp_path, attachment):
+    return (tmp_path / attachment.source).read_bytes()
+
+
+def test_large_bodies_stay_inline_by_default(store, tmp_path):
+    body = 'x' * (256 * 1024)
+    store.attach(body, 'Response')
+    attachment, = store.item.attachments
+    assert not attachment.source.endswith('.gz')
+    assert attachment.type == 'text/plain' and attachment.name == 'Response'
+    assert read(tmp_path, attachment) == body.encode()
+
+
+def test_gzip_is_opt_in(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(setting, 'ALLURE_GZIP_BYTES', 1024)
+    body = 'y' * 2048
+    store.attach(body, 'Response')
+    store.attach('small', 'Small')
+    large, small = store.item.attachments
+    assert large.source.endswith('.gz') and large.type == 'application/gzip'
+    assert gzip.decompress(read(tmp_path, large)) == body.encode()
+    assert not small.source.endswith('.gz')
+
+
+@pytest.mark.parametrize('body, data', [
+    (200, b'200'),
+    ({'code': 0}, b"{'code': 0}"),
+    (bytearray(b'raw'), b'raw'),
+    ('中文', '中文'.encode('utf-8')),
+])
+def test_body_conversion(store, tmp_path, body, data):
+    store.attach(body, 'Body', allure.attachment_type.TEXT)
+    attachment, = store.item.attachments
+    assert read(tmp_path, attachment) == data
+
+
+def test_identical_bodies_share_one_file(store, tmp_path):
+    store.attach('same', 'First')
+    store.attach('same', 'Second')
+    first, second = store.item.attachments
+    assert first.source == second.source
+    assert len(list(tmp_path.iterdir())) == 1
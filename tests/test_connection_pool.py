@@ -0,0 +1,99 @@
+import pytest
+
+from common.connection import MysqlPool, limit_one
+from conf import setting
+
+
+def run(pool, query):
+    with pool.connection() as conn, conn.cursor() as cursor:
+        cursor.execute(query)
+
+
+def test_transaction_commits_on_success(mysql_pool):
+    with mysql_pool.transaction() as conn:
+        run(mysql_pool, 'INSERT 1')
+        run(mysql_pool, 'INSERT 2')
+    assert conn.log == ['BEGIN', 'INSERT 1', 'INSERT 2', 'COMMIT']
+    # Every query of the transaction used one checkout, returned afterwards
+    assert mysql_pool.stats()['idle'] == 1 and len(mysql_pool.connections) == 1
+    assert not MysqlPool.in_transaction()
+
+
+def test_transaction_rolls_back_on_error_and_when_asked(mysql_pool):
+    with pytest.raises(RuntimeError):
+        with mysql_pool.transaction():
+            run(mysql_pool, 'INSERT 1')
+            raise RuntimeError('boom')
+    with mysql_pool.transaction(rollback=True):
+        run(mysql_pool, 'INSERT 2')
+    conn, = mysql_pool.connections
+    assert conn.log == ['BEGIN', 'INSERT 1', 'ROLLBACK', 'BEGIN', 'INSERT 2', 'ROLLBACK']
+
+
+def test_nested_scopes_are_savepoints(mysql_pool):
+    with mysql_pool.transaction() as conn:
+        run(mysql_pool, 'INSERT seed')
+        with mysql_pool.isolation():
+            run(mysql_pool, 'INSERT test')
+        with pytest.raises(ValueError):
+            with mysql_pool.transaction():
+                run(mysql_pool, 'INSERT failing')
+                raise ValueError
+        with mysql_pool.transaction():
+            run(mysql_pool, 'INSERT kept')
+    assert conn.log == [
+        'BEGIN', 'INSERT seed',
+        'SAVEPOINT tf_sp_1', 'INSERT test', 'ROLLBACK TO SAVEPOINT tf_sp_1', 'RELEASE SAVEPOINT tf_sp_1',
+        'SAVEPOINT tf_sp_1', 'INSERT failing', 'ROLLBACK TO SAVEPOINT tf_sp_1', 'RELEASE SAVEPOINT tf_sp_1',
+        'SAVEPOINT tf_sp_1', 'INSERT kept', 'RELEASE SAVEPOINT tf_sp_1',
+        'COMMIT',
+    ]
+    assert len(mysql_pool.connections) == 1
+
+
+def test_isolation_connects_lazily(mysql_pool):
+    with mysql_pool.isolation():
+        assert MysqlPool.in_transaction()
+    assert mysql_pool.connections == [] and mysql_pool.checkouts == 0
+
+    with mysql_pool.isolation():
+        run(mysql_pool, 'UPDATE t')
+    conn, = mysql_pool.connections
+    assert conn.log == ['SET TRANSACTION ISOLATION LEVEL READ COMMITTED', 'BEGIN', 'UPDATE t', 'ROLLBACK']
+
+
+def test_isolation_level_is_configurable(mysql_pool, monkeypatch):
+    monkeypatch.setattr(setting, 'DB_ISOLATION_LEVEL', None)
+    with mysql_pool.isolation():
+        run(mysql_pool, 'UPDATE t')
+    # Plain transaction() scopes keep the server default as well
+    with mysql_pool.transaction():
+        run(mysql_pool, 'INSERT 1')
+    conn, = mysql_pool.connections
+    assert conn.log == ['BEGIN', 'UPDATE t', 'ROLLBACK', 'BEGIN', 'INSERT 1', 'COMMIT']
+
+
+def test_pool_bounds_checkouts(mysql_pool):
+    first, second = mysql_pool.acquire(), mysql_pool.acquire()
+    with pytest.raises(TimeoutError):
+        mysql_pool.acquire()
+    mysql_pool.release(first)
+    assert mysql_pool.acquire() is first
+    mysql_pool.release(second, discard=True)
+    assert second.closed and mysql_pool.stats()['size'] == 1
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('select * from t', 'select * from t LIMIT 1'),
+    ('select * from t where id = %s;', 'select * from t where id = %s LIMIT 1'),
+    ('select * from t limit 5', 'select * from t limit 5'),
+    ('select * from t limit 5, 10', 'select * from t limit 5, 10'),
+    ('select * from t limit %s', 'select * from t limit %s'),
+    ('select * from t limit %s offset %s', 'select * from t limit %s offset %s'),
+    ('select * from t LIMIT %(n)s OFFSET %(skip)s', 'select * from t LIMIT %(n)s OFFSET %(skip)s'),
+    ('select * from t limit %s, %(n)s', 'select * from t limit %s, %(n)s'),
+    ('select * from t for update', 'select * from t for update'),
+    ('delete from t', 'delete from t'),
+])
+def test_limit_one(query, expected):
+    assert limit_one(query) == expected
@@ -0,0 +1,181 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from base.dag_scheduler import CaseGraph, CaseNode, DagScheduler
+
+
+def node(index, name, extract=None, reads=(), file='cases.yaml'):
+    base_info = {'api_name': name, 'url': f'/{name}', 'method': 'get', 'header': {}}
+    test_case = {'case_name': name, 'params': {key: '${get_extract_data(%s)}' % key for key in reads}}
+    if extract:
+        test_case['extract'] = {key: '$.%s' % key for key in extract}
+    return CaseNode(index, file, base_info, test_case)
+
+
+def names(nodes):
+    return sorted(n.test_case['case_name'] for n in nodes)
+
+
+def test_consumer_depends_on_producer():
+    login, products, detail, other = graph_nodes = [
+        node(0, 'login', extract=['token']),
+        node(1, 'products', extract=['goodsId'], reads=['token']),
+        node(2, 'detail', reads=['goodsId', 'cookie']),
+        node(3, 'other'),
+    ]
+    CaseGraph(graph_nodes)
+
+    assert names(products.depends_on) == ['login']
+    # cookie has no producer in the graph, it adds no edge
+    assert names(detail.depends_on) == ['products']
+    assert not other.predecessors and not other.followers
+    assert names(login.dependents) == ['products']
+
+
+def test_consumer_before_its_producer_reads_the_last_writer():
+    reader, first, second = graph_nodes = [
+        node(0, 'reader', reads=['orderNumber']),
+        node(1, 'first', extract=['orderNumber']),
+        node(2, 'second', extract=['orderNumber']),
+    ]
+    CaseGraph(graph_nodes)
+
+    assert names(reader.depends_on) == ['second']
+    assert names(second.after) == ['first']
+
+
+def test_writers_of_one_key_are_serialized():
+    scenario, pay_a, commit, pay_b = graph_nodes = [
+        node(0, 'scenario', extract=['orderNumber']),
+        node(1, 'pay_a', reads=['orderNumber']),
+        node(2, 'commit', extract=['orderNumber']),
+        node(3, 'pay_b', reads=['orderNumber']),
+    ]
+    CaseGraph(graph_nodes)
+
+    # Each reader sees the closest earlier write, the next writer waits for it
+    assert names(pay_a.depends_on) == ['scenario']
+    assert names(pay_b.depends_on) == ['commit']
+    assert names(commit.after) == ['pay_a', 'scenario']
+    assert not commit.depends_on
+
+
+def test_cycle_is_rejected():
+    graph_nodes = [node(0, 'a', extract=['x'], reads=['y']), node(1, 'b', extract=['y'], reads=['x'])]
+    with pytest.raises(ValueError, match='Extract dependency cycle'):
+        CaseGraph(graph_nodes)
+
+
+class FakeItem:
+    """Collected pytest item as far as order_items looks at it."""
+
+    def __init__(self, params=None, path=None):
+        if params is not None:
+            self.callspec = SimpleNamespace(params=params)
+        if path is not None:
+            self.path = path
+
+
+def fake_item(base_info, test_case, path=None):
+    return FakeItem({'base_info': base_info, 'testcase': test_case}, path)
+
+
+def test_order_items_moves_consumers_after_producers():
+    pay, free, commit = graph_nodes = [
+        node(0, 'pay', reads=['orderNumber']),
+        node(1, 'free'),
+        node(2, 'commit', extract=['orderNumber']),
+    ]
+    graph = CaseGraph(graph_nodes)
+    items = [fake_item(n.base_info, n.test_case) for n in graph_nodes]
+    unrelated = FakeItem()
+
+    ordered = graph.order_items(items + [unrelated])
+
+    assert [i.callspec.params['testcase']['case_name'] for i in ordered[:3]] == ['free', 'commit', 'pay']
+    assert ordered[3] is unrelated
+
+
+def test_same_case_in_two_files_matches_each_files_item(tmp_path):
+    # A business scenario repeats the single-interface pay case with the same key
+    scenario_dir, single_dir = tmp_path / 'Business', tmp_path / 'Products'
+    scenario_commit = node(0, 'commit', extract=['orderNumber'], file=str(scenario_dir / 'scenario.yml'))
+    scenario_pay = node(1, 'pay', reads=['orderNumber'], file=str(scenario_dir / 'scenario.yml'))
+    commit = node(2, 'commit', extract=['orderNumber'], file=str(single_dir / 'commit.yaml'))
+    pay = node(3, 'pay', reads=['orderNumber'], file=str(single_dir / 'pay.yaml'))
+    graph = CaseGraph([scenario_commit, scenario_pay, commit, pay])
+
+    def block(n):
+        return {'baseInfo': n.base_info, 'testCase': [n.test_case]}
+
+    # Collection puts the single-interface pay first, the scenario items last
+    single_pay = fake_item(pay.base_info, pay.test_case, single_dir / 'test_products.py')
+    single_commit = fake_item(commit.base_info, commit.test_case, single_dir / 'test_products.py')
+    scenario_items = [FakeItem({'case_info': block(n)}, scenario_dir / 'test_scenario.py')
+                      for n in (scenario_commit, scenario_pay)]
+    items = [single_pay, single_commit] + scenario_items
+
+    owner = graph.match_items(items)
+    assert owner[pay] is single_pay and owner[commit] is single_commit
+    assert owner[scenario_pay] is scenario_items[1]
+    # orderNumber writers run in declaration order, each pay after its own commit
+    assert graph.order_items(items) == scenario_items + [single_commit, single_pay]
+    upstream = graph.upstream_items(items)
+    assert upstream[single_pay] == {single_commit}
+    assert upstream[scenario_items[1]] == {scenario_items[0]}
+
+
+def test_items_are_matched_one_to_one():
+    first = node(0, 'list', extract=['goodsId'])
+    second = node(1, 'list', extract=['goodsId'], file='other.yaml')
+    graph = CaseGraph([first, second])
+    items = [fake_item(first.base_info, first.test_case), fake_item(second.base_info, second.test_case)]
+
+    owner = graph.match_items(items)
+    assert owner[first] is items[0] and owner[second] is items[1]
+
+
+def run_graph(graph, failing=()):
+    scheduler = DagScheduler(graph, concurrency=4)
+    started = []
+
+    async def run_case(base_info, test_case, semaphore, executor):
+        started.append(test_case['case_name'])
+        await asyncio.sleep(0)
+        passed = test_case['case_name'] not in failing
+        return {'case_name': test_case['case_name'], 'status': 'passed' if passed else 'failed',
+                'error': None, 'elapsed': 0}
+
+    scheduler.engine.run_case = run_case
+    return asyncio.run(scheduler.run_graph()), started
+
+
+def test_scheduler_respects_dependencies():
+    graph = CaseGraph([
+        node(0, 'login', extract=['token']),
+        node(1, 'products', extract=['goodsId'], reads=['token']),
+        node(2, 'detail', reads=['goodsId']),
+        node(3, 'independent'),
+    ])
+    results, started = run_graph(graph)
+
+    assert all(r['status'] == 'passed' for r in results)
+    # Independent cases start with the first wave
+    assert set(started[:2]) == {'login', 'independent'}
+    assert started.index('products') < started.index('detail')
+
+
+def test_failed_producer_skips_data_dependents_only():
+    graph = CaseGraph([
+        node(0, 'scenario', extract=['orderNumber']),
+        node(1, 'pay_a', reads=['orderNumber']),
+        node(2, 'commit', extract=['orderNumber']),
+        node(3, 'pay_b', reads=['orderNumber']),
+    ])
+    results, started = run_graph(graph, failing={'scenario'})
+
+    status = {r['case_name'].split('::')[1]: r['status'] for r in results}
+    assert status == {'scenario': 'failed', 'pay_a': 'skipped', 'commit': 'passed', 'pay_b': 'passed'}
+    assert 'pay_a' not in started
@@ -0,0 +1,50 @@
+import pytest
+
+from common.connection import MysqlPool
+from common.data_seeder import DataSeeder, Dataset
+
+INSERT = 'INSERT INTO `sys_user` (`login_name`, `user_name`) VALUES (%s, %s)'
+
+
+def datasets():
+    return [Dataset('sys_user', ['login_name', 'user_name'], [['t1', 'A'], ['t2', 'B']], key=['login_name'])]
+
+
+def test_rollback_seed_is_not_bound_to_the_context(mysql_pool):
+    seeder = DataSeeder(datasets(), cleanup='rollback', pool=mysql_pool)
+    seeder.seed()
+    seed_conn = seeder.connection
+    assert not MysqlPool.in_transaction()
+
+    # A test's own isolation scope gets a separate connection and transaction
+    with mysql_pool.isolation(), mysql_pool.connection() as conn:
+        assert conn is not seed_conn
+        assert conn.log[-1] == 'BEGIN'
+
+    seeder.cleanup()
+    assert seeder.connection is None
+    assert seed_conn.log == ['BEGIN', (INSERT, [('t1', 'A'), ('t2', 'B')]), 'ROLLBACK']
+    assert mysql_pool.stats()['idle'] == 2
+
+
+def test_failed_rollback_seed_releases_its_connection(mysql_pool, monkeypatch):
+    seeder = DataSeeder(datasets(), cleanup='rollback', pool=mysql_pool)
+    monkeypatch.setattr(seeder, '_insert', lambda conn: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        seeder.seed()
+    conn, = mysql_pool.connections
+    assert conn.log == ['BEGIN', 'ROLLBACK']
+    assert seeder.connection is None and mysql_pool.stats()['idle'] == 1
+
+
+def test_delete_seed_commits_and_deletes_keys(mysql_pool):
+    seeder = DataSeeder(datasets(), cleanup='delete', batch_size=1, pool=mysql_pool)
+    seeder.seed()
+    assert not MysqlPool.in_transaction()
+    seeder.cleanup()
+    conn, = mysql_pool.connections
+    assert conn.log == [
+        'BEGIN', (INSERT, [('t1', 'A')]), (INSERT, [('t2', 'B')]), 'COMMIT',
+        'BEGIN', 'DELETE FROM `sys_user` WHERE (`login_name`) IN ((%s))',
+        'DELETE FROM `sys_user` WHERE (`login_name`) IN ((%s))', 'COMMIT',
+    ]
@@ -0,0 +1,93 @@
+import os
+
+import yaml
+
+from common.extract_store import JOURNAL_SUFFIX, ExtractStore, SqliteExtractStore, shared_across_workers
+from conf import setting
+
+
+def test_update_is_journaled_and_replayed(tmp_path):
+    path = str(tmp_path / 'extract.yaml')
+    store = ExtractStore(path)
+    store.update({'token': 'abc', 'ids': [1, 2]})
+    store.update({'token': 'def'})
+
+    # A new process (or a crashed run) replays the journal
+    replayed = ExtractStore(path)
+    assert replayed.get_data() == {'token': 'def', 'ids': [1, 2]}
+    assert replayed['ids'] == [1, 2]
+    assert replayed.get('missing', 'x') == 'x'
+
+
+def test_compact_folds_journal_into_yaml(tmp_path):
+    path = str(tmp_path / 'extract.yaml')
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump({'kept': 1}, f)
+    store = ExtractStore(path)
+    store.update({'orderNumber': 'N1'})
+    store.compact()
+
+    assert not os.path.exists(path + JOURNAL_SUFFIX)
+    with open(path, encoding='utf-8') as f:
+        assert yaml.safe_load(f) == {'kept': 1, 'orderNumber': 'N1'}
+    assert ExtractStore(path).get_data() == {'kept': 1, 'orderNumber': 'N1'}
+
+
+def test_torn_journal_line_is_skipped(tmp_path):
+    path = str(tmp_path / 'extract.yaml')
+    store = ExtractStore(path)
+    store.update({'a': 1})
+    store.compact()
+    store.update({'b': 2})
+    store._close_journal()
+    with open(path + JOURNAL_SUFFIX, 'a', encoding='utf-8') as f:
+        f.write('{"c": ')
+
+    assert ExtractStore(path).get_data() == {'a': 1, 'b': 2}
+
+
+def test_clear_empties_file_and_journal(tmp_path):
+    path = str(tmp_path / 'extract.yaml')
+    store = ExtractStore(path)
+    store.update({'a': 1})
+    store.clear()
+
+    assert store.get_data() == {}
+    assert not os.path.exists(path + JOURNAL_SUFFIX)
+    assert ExtractStore(path).get_data() == {}
+
+
+def test_sqlite_namespaces_are_isolated(tmp_path):
+    db_path = str(tmp_path / 'extract.db')
+    gw0 = SqliteExtractStore(db_path, namespace='gw0')
+    gw1 = SqliteExtractStore(db_path, namespace='gw1')
+    gw0.update({'token': 'a', 'ids': [1]})
+    gw1.update({'token': 'b'})
+
+    # Clearing one worker's namespace leaves the other worker's keys alone
+    gw0.clear()
+    assert gw0.get_data() == {}
+    assert gw1.get_data() == {'token': 'b'}
+    assert SqliteExtractStore(db_path, namespace='gw1')['token'] == 'b'
+
+
+def test_shared_across_workers(monkeypatch):
+    monkeypatch.setattr(setting, 'EXTRACT_BACKEND', 'sqlite')
+    monkeypatch.setattr(setting, 'EXTRACT_NAMESPACE', 'worker')
+    assert not shared_across_workers()
+    monkeypatch.setattr(setting, 'EXTRACT_NAMESPACE', 'shared')
+    assert shared_across_workers()
+    monkeypatch.setattr(setting, 'EXTRACT_BACKEND', 'yaml')
+    assert shared_across_workers()
+
+
+def test_plain_lookup_reads_one_key(monkeypatch):
+    from common.debugtalk import DebugTalk
+    from common.operator_yaml import OperatorYaml
+
+    def fail(self):
+        raise AssertionError('plain lookup loaded all extract data')
+
+    monkeypatch.setattr(OperatorYaml, 'get_extract_yaml', lambda self, name, second=None: f'value of {name}')
+    monkeypatch.setattr(OperatorYaml, 'get_data', fail)
+    assert DebugTalk().get_extract_data('token') == 'value of token'
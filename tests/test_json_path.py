@@ -0,0 +1,89 @@
+import pytest
+
+from common import json_path
+
+reference = pytest.importorskip('jsonpath')
+
+DOCUMENT = {
+    'code': 0,
+    'status': 'ok',
+    'msg': 'success',
+    'data': {'user_token': 'tk-1', 'status': 'active'},
+    'goodsList': [
+        {'goodsId': 18382788819, 'status': 'ok', 'price': 10},
+        {'goodsId': 18382788820, 'status': 'sold out', 'price': 25},
+        {'goodsId': 18382788821, 'status': 'ok', 'price': 30, 'tags': {'status': 'new'}},
+    ],
+    'list': [{'status': 'ok', 'id': 1}, {'status': 'failed', 'id': 2}, {'id': 3}],
+    'orderNumber': 'N20260101',
+    'userId': 1001,
+}
+
+# Paths used by the YAML cases plus the forms assertions build
+EXPRESSIONS = [
+    '$.status',
+    '$.data.user_token',
+    '$.goodsList[*].goodsId',
+    '$.orderNumber',
+    '$.userId',
+    '$..status',
+    '$..goodsId',
+    '$..code',
+    '$..missing',
+    '$.missing',
+    '$.*',
+    '$..[*]',
+    "$['data']",
+    '$.list[0]',
+    '$.list[0:2]',
+    '$.list[0,2]',
+    '$.list[*]',
+    "$.list[?(@.status == 'ok')]",
+    "$.goodsList[?(@.price > 10)].goodsId",
+    '$.goodsList[?(@.tags)]',
+]
+
+
+@pytest.mark.parametrize('expr', EXPRESSIONS)
+def test_parity_with_jsonpath(expr):
+    assert json_path.jsonpath(DOCUMENT, expr) == reference.jsonpath(DOCUMENT, expr)
+
+
+def test_multipath_matches_single_paths():
+    results = json_path.compile_paths(tuple(EXPRESSIONS)).evaluate(DOCUMENT)
+    for expr in EXPRESSIONS:
+        assert results[expr] == (reference.jsonpath(DOCUMENT, expr) or [])
+
+
+FALSY_MEMBERS = {
+    'items': [
+        {'id': 1, 'flag': None}, {'id': 2, 'flag': []}, {'id': 3, 'flag': {}},
+        {'id': 4, 'flag': 0}, {'id': 5, 'flag': ''}, {'id': 6, 'flag': False},
+        {'id': 7, 'flag': 'yes'}, {'id': 8, 'flag': [0]}, {'id': 9}, {'id': 10, 'flag': {'on': 1}},
+    ],
+}
+
+
+@pytest.mark.parametrize('expr', [
+    '$.items[?(@.flag)]',
+    '$.items[?(@.flag)].id',
+    '$.items[?(@.flag.on)].id',
+    '$.items[?(@.flag || @.id == 9)].id',
+    '$.items[?(@.id == 9 || @.flag)].id',
+    '$.items[?(@.id > 2 && @.flag)].id',
+    "$.items[?(@.flag == 'yes')].id",
+])
+def test_filters_match_jsonpath_on_falsy_and_missing_members(expr):
+    assert json_path.jsonpath(FALSY_MEMBERS, expr) == reference.jsonpath(FALSY_MEMBERS, expr)
+
+
+def test_negative_index_extension():
+    # jsonpath 0.82 finds nothing for negative indexes, the compiled paths count from the end
+    assert reference.jsonpath(DOCUMENT, '$.list[-1]') is False
+    assert json_path.jsonpath(DOCUMENT, '$.list[-1]') == [{'id': 3}]
+    assert json_path.jsonpath(DOCUMENT, '$.list[-4]') is False
+
+
+def test_unsupported_expression():
+    with pytest.raises(json_path.JsonPathError):
+        json_path.compile_path('$.list[?(@.a.b() == 1)]')
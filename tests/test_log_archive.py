@@ -0,0 +1,62 @@
+import gzip
+import os
+import time
+
+from common.log_archive import LogArchiver, read_index
+
+RECORD = 'INFO - 2026-10-18 03:00:00 - x.py:1 -[x:y] - hello\n'
+
+
+def write(path, text=RECORD):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_recover_leaves_active_files_of_other_workers(tmp_path):
+    today = time.strftime('%Y%m%d')
+    names = {
+        'own': f'test.gw0.{today}.logs',
+        'sibling': f'test.gw1.{today}.logs',
+        'controller': f'test.{today}.logs',
+        'old_day': 'test.gw1.20200101.logs',
+        'segment': 'test.gw1.20261018-030000.logs',
+    }
+    for name in names.values():
+        write(tmp_path / name)
+
+    archiver = LogArchiver(str(tmp_path))
+    try:
+        archiver._recover(str(tmp_path / names['own']))
+    finally:
+        archiver.executor.shutdown()
+
+    for key in ('own', 'sibling', 'controller'):
+        assert (tmp_path / names[key]).exists()
+        assert not (tmp_path / (names[key] + '.gz')).exists()
+    for key in ('old_day', 'segment'):
+        assert not (tmp_path / names[key]).exists()
+        with gzip.open(tmp_path / (names[key] + '.gz'), 'rt', encoding='utf-8') as f:
+            assert f.read() == RECORD
+    assert sorted(entry['file'] for entry in read_index(str(tmp_path))) == sorted(
+        names[key] + '.gz' for key in ('old_day', 'segment'))
+
+
+def test_worker_rollover_uses_worker_prefix(tmp_path):
+    from common.record_log import ArchivingFileHandler
+
+    archived = []
+
+    class Archiver:
+        def archive(self, segment):
+            archived.append(segment)
+
+    handler = ArchivingFileHandler(str(tmp_path / 'test.gw3.20261018.logs'), Archiver(), 'test.gw3',
+                                   mode='a', maxBytes=10, encoding='utf-8')
+    try:
+        handler.stream.write(RECORD)
+        handler.doRollover()
+    finally:
+        handler.close()
+    segment, = archived
+    assert os.path.basename(segment).startswith('test.gw3.')
+    assert os.path.exists(segment)
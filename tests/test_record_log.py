@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+
+from common.record_log import logs, record_log
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Messages handed to the writer thread instead of a capture."""
+    messages = []
+    monkeypatch.setattr(record_log.handler, 'enqueue', lambda record: messages.append(record.getMessage()))
+    yield messages
+    record_log.stop_capture()
+
+
+def in_thread(func):
+    thread = threading.Thread(target=func)
+    thread.start()
+    thread.join()
+
+
+def test_capture_is_per_thread(written):
+    record_log.start_capture()
+    logs.info('from the test')
+    in_thread(lambda: logs.info('from a background thread'))
+    # Another thread stopping its capture leaves this one alone
+    in_thread(record_log.stop_capture)
+    logs.info('still the test')
+
+    assert written == ['from a background thread']
+    text = record_log.flush_capture('test failed')
+    assert 'from the test' in text and 'still the test' in text
+    assert 'background' not in text
+
+
+def test_asyncio_tasks_share_the_test_capture(written):
+    async def worker(index):
+        logs.info('task %s', index)
+
+    async def main():
+        await asyncio.gather(*(worker(i) for i in range(3)))
+
+    record_log.start_capture()
+    asyncio.run(main())
+    assert written == []
+    text = record_log.flush_capture('failed')
+    assert all(f'task {i}' in text for i in range(3))
+
+
+def test_stop_capture_discards(written):
+    record_log.start_capture()
+    logs.info('dropped')
+    record_log.stop_capture()
+    logs.info('direct')
+    assert written == ['direct']
+    assert record_log.flush_capture('nothing') is None
+
+
+def test_async_send_logs_into_the_test_capture(written, api_server):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from common.send_request import SendRequest
+
+    async def send(executor):
+        return await SendRequest().run_main_async(
+            name='echo', url=api_server + '/echo', case_name='capture', header={}, method='get',
+            executor=executor)
+
+    record_log.start_capture()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        response = asyncio.run(send(executor))
+
+    assert response.status_code == 200
+    # The Response record is logged on the executor thread
+    assert not any(message.startswith('Response:') for message in written)
+    assert 'Response: ' in record_log.flush_capture('failed')
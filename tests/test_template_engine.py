@@ -0,0 +1,92 @@
+import itertools
+
+import pytest
+
+from base import apiutil_business
+from base.apiutil_business import RequestBase as BusinessRequestBase
+from common.template_engine import register_function, render
+
+_counter = itertools.count(1)
+
+
+@register_function('tpl_number')
+def tpl_number():
+    return 42
+
+
+@register_function('tpl_counter')
+def tpl_counter():
+    return next(_counter)
+
+
+@register_function('tpl_ids')
+def tpl_ids():
+    return [3, 4]
+
+
+@register_function('tpl_echo')
+def tpl_echo(*args):
+    return '-'.join(args)
+
+
+def test_single_placeholder_keeps_native_type():
+    assert render('${tpl_number()}') == 42
+    assert render({'n': '${tpl_number()}'}) == {'n': 42}
+
+
+def test_embedded_placeholders_are_text():
+    assert render('id=${tpl_number()}&x=${tpl_echo(a,b)}') == 'id=42&x=a-b'
+
+
+def test_list_results_are_joined():
+    assert render({'ids': '${tpl_ids()}'}) == {'ids': '3,4'}
+
+
+def test_unknown_function_raises():
+    with pytest.raises(NameError, match='tpl_missing'):
+        render('${tpl_missing()}')
+
+
+def test_static_values_pass_through():
+    assert render(None) is None
+    assert render(7) == 7
+    assert render('plain text') == 'plain text'
+
+
+def test_cached_plan_is_evaluated_on_every_render():
+    block = {'seq': '${tpl_counter()}'}
+    first, second = render(block)['seq'], render(block)['seq']
+    assert second == first + 1
+    assert block == {'seq': '${tpl_counter()}'}
+
+
+def test_rendered_output_does_not_alias_the_source():
+    block = {'static': {'page': 1, 'tags': ['a']}, 'dynamic': {'n': '${tpl_number()}', 'opts': {'x': 1}}}
+
+    rendered = render(block)
+    rendered['static']['page'] = 99
+    rendered['static']['tags'].append('b')
+    rendered['dynamic']['opts'].pop('x')
+    rendered.pop('static')
+
+    assert block == {'static': {'page': 1, 'tags': ['a']}, 'dynamic': {'n': '${tpl_number()}', 'opts': {'x': 1}}}
+    assert render(block) == {'static': {'page': 1, 'tags': ['a']}, 'dynamic': {'n': 42, 'opts': {'x': 1}}}
+
+
+def test_fully_static_block_is_copied():
+    block = {'a': [1, {'b': 2}]}
+    rendered = render(block)
+    rendered['a'][1]['b'] = 3
+    assert rendered is not block and block == {'a': [1, {'b': 2}]}
+
+
+def test_business_replace_load_keeps_parameters(monkeypatch):
+    errors = []
+    monkeypatch.setattr(apiutil_business.logs, 'error', errors.append)
+    base = BusinessRequestBase()
+    assert base.replace_load({'ids': [1, 2], 'a': 'x'}) == {'ids': [1, 2], 'a': 'x'}
+    assert base.replace_load({'a': 'x', 'ids': ['1,2', '3']}) == {'a': 'x', 'ids': ['1', '2', '3']}
+    # Lists that are not all strings are left alone and later keys are still split
+    assert base.replace_load({'ids': [1, 2], 'names': ['a,b'], 'empty': []}) == {
+        'ids': [1, 2], 'names': ['a', 'b'], 'empty': []}
+    assert errors == []